@@ -0,0 +1,73 @@
+"""Measure how long a programmify program takes from process spawn until its window is shown.
+
+The program is started N times with the Qt offscreen platform and PROGRAMMIFY_LAUNCH_PROBE set, which makes
+`Programmify._run` write the time once the window is shown and the event loop is running, then quit.
+Use it to compare a --onefile build against a --onedir build of the same program. Example usage:
+    $: python benchmarks/launch_latency.py "dist/my_program.exe" --runs 20
+    $: python benchmarks/launch_latency.py "my_program/my_program.exe" --runs 20 --json onedir.json
+    $: python benchmarks/launch_latency.py python my_program.py
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+
+def launch_once(cmd: list, timeout: float = 60) -> float:
+    """Start `cmd` once and return the seconds from spawn until its window was shown."""
+    with tempfile.TemporaryDirectory() as tmp:
+        probe = Path(tmp) / "launch.txt"
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen", PROGRAMMIFY_LAUNCH_PROBE=str(probe))
+        start = time.time()
+        subprocess.run(cmd, env=env, timeout=timeout, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        if not probe.exists():
+            raise RuntimeError(f"{cmd} exited without showing a window")
+        return float(probe.read_text().split()[0]) - start
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def measure(cmd: list, runs: int = 10, warmup: int = 1, timeout: float = 60) -> dict:
+    for _ in range(warmup):
+        # the first launch pays for a cold disk cache, and onefile builds for the first unpack
+        launch_once(cmd, timeout)
+    times = [launch_once(cmd, timeout) * 1000 for _ in range(runs)]
+    return {
+        "cmd": cmd,
+        "runs": runs,
+        "min_ms": min(times),
+        "median_ms": statistics.median(times),
+        "mean_ms": statistics.mean(times),
+        "p90_ms": percentile(times, 90),
+        "max_ms": max(times),
+        "stdev_ms": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "times_ms": times,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("cmd", nargs="+", help="Built program (or command) to launch")
+    parser.add_argument("--runs", type=int, default=10, help="Number of measured launches")
+    parser.add_argument("--warmup", type=int, default=1, help="Number of launches to discard first")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for each launch")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    r = measure(args.cmd, args.runs, args.warmup, args.timeout)
+    print(f"{' '.join(args.cmd)}: {r['runs']} launches")
+    for key in ("min_ms", "median_ms", "mean_ms", "p90_ms", "max_ms", "stdev_ms"):
+        print(f"  {key[:-3]:<7} {r[key]:8.1f}ms")
+    if args.json:
+        Path(args.json).write_text(json.dumps(r, indent=2))
+
+
+if __name__ == '__main__':
+    main()
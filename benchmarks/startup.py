@@ -0,0 +1,75 @@
+"""Measure how long it takes to import each console script entry point declared in pyproject.toml.
+
+Every measurement runs in a fresh interpreter so nothing is cached between runs. Example usage:
+    $: python benchmarks/startup.py
+    $: python benchmarks/startup.py --runs 20 --json startup.json
+"""
+import argparse
+import ast
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+pyproject = Path(__file__).resolve().parent.parent / "pyproject.toml"
+
+# modules we do not want an entry point to pull in unless it actually needs them
+heavy_modules = ["PyQt5.QtWidgets", "yaml", "setproctitle", "PIL"]
+
+probe = """
+import sys, time
+t0 = time.perf_counter()
+from {module} import {attr}
+elapsed = time.perf_counter() - t0
+print(repr((elapsed, [m for m in {heavy!r} if m in sys.modules])))
+"""
+
+
+def entry_points(path=pyproject) -> dict:
+    """Read [project.scripts] from pyproject.toml."""
+    text = Path(path).read_text()
+    try:
+        import tomllib
+        return tomllib.loads(text)["project"]["scripts"]
+    except ImportError:
+        section = text.split("[project.scripts]", 1)[1].split("\n[", 1)[0]
+        return dict(re.findall(r'^\s*([\w-]+)\s*=\s*"([^"]+)"', section, re.M))
+
+
+def measure(target: str, runs: int = 10) -> dict:
+    module, attr = target.split(":")
+    code = probe.format(module=module, attr=attr, heavy=heavy_modules)
+    times = []
+    loaded = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        elapsed, loaded = ast.literal_eval(out.strip().splitlines()[-1])
+        times.append(elapsed * 1000)
+    return {
+        "target": target,
+        "runs": runs,
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "heavy_modules_loaded": loaded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10, help="Number of fresh interpreters per entry point")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results = {name: measure(target, args.runs) for name, target in entry_points().items()}
+    for name, r in results.items():
+        print(f"{name:<12} {r['target']:<24} median {r['median_ms']:7.1f}ms  min {r['min_ms']:7.1f}ms  "
+              f"loaded: {', '.join(r['heavy_modules_loaded']) or '-'}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
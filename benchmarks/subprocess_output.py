@@ -0,0 +1,271 @@
+"""Benchmark the output path of SubprocessWidget: child process -> ProcessThread -> LogView on screen.
+
+Every scenario runs in a fresh process with the Qt offscreen platform, showing a SubprocessWidget that runs a synthetic
+child (this script with --child) writing numbered, timestamped lines at a given rate, length, share of stderr and
+burst pattern. For every scenario it measures:
+    - lines per second rendered, from the first line written to the last line painted
+    - latency from the child writing a line until the LogView showing it is painted (p50, p90, p99, max)
+    - event loop stalls of the GUI thread longer than --stall_ms (count, total and longest)
+    - peak RSS of the GUI process
+Example usage:
+    $: python benchmarks/subprocess_output.py
+    $: python benchmarks/subprocess_output.py --scenarios flood bursty --json 1.2.0.json
+    $: python benchmarks/subprocess_output.py --json new.json --compare 1.2.0.json
+    $: python benchmarks/subprocess_output.py --scenarios steady --rate 5000 --length 200 --flush_interval 0
+    $: python benchmarks/subprocess_output.py --scenarios flood --rules rules.json  # cost of output rules
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+scenarios = {
+    # a chatty service logging at a steady pace
+    "steady": dict(lines=5000, rate=1000, length=80, stderr_ratio=0.0, burst=1, burst_interval=0.0),
+    # as fast as the child can write
+    "flood": dict(lines=200000, rate=0, length=80, stderr_ratio=0.0, burst=1, burst_interval=0.0),
+    # stack traces, json blobs
+    "long_lines": dict(lines=20000, rate=0, length=2000, stderr_ratio=0.0, burst=1, burst_interval=0.0),
+    # interleaved stdout and stderr, which are displayed as separate runs
+    "stderr_mix": dict(lines=50000, rate=0, length=80, stderr_ratio=0.3, burst=1, burst_interval=0.0),
+    # quiet, then thousands of lines at once
+    "bursty": dict(lines=50000, rate=0, length=120, stderr_ratio=0.0, burst=5000, burst_interval=0.5),
+}
+child_options = ["lines", "rate", "length", "stderr_ratio", "burst", "burst_interval"]
+widget_options = {"flush_interval": 30, "max_batch": 500, "scrollback_lines": 10000}
+
+
+def child(lines: int, rate: float, length: int, stderr_ratio: float, burst: int, burst_interval: float,
+          seed: int = 0):
+    """Write `lines` lines of `length` characters, `burst` at a time, at `rate` lines/s (0 for as fast as possible)
+    with `burst_interval` seconds between bursts. Every line starts with its number and the time it was written."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    burst = max(1, burst)
+    for first in range(0, lines, burst):
+        for seq in range(first, min(first + burst, lines)):
+            stream = sys.stderr if rng.random() < stderr_ratio else sys.stdout
+            head = f"{seq} {time.time():.6f} "
+            stream.write(head + "x" * max(0, length - len(head)) + "\n")
+        sys.stdout.flush()
+        sys.stderr.flush()
+        if burst_interval:
+            time.sleep(burst_interval)
+        if rate:
+            # keep to the schedule rather than sleeping a fixed time, so writing does not slow the rate down
+            delay = start + (first + burst) / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3
+
+
+def percentile(values: list, p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run_scenario(params: dict, widget_kw: dict, stall_ms: float = 50, timeout: float = 120) -> dict:
+    """Show a SubprocessWidget running the synthetic child with `params` until every line was painted."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5 import QtCore, QtWidgets
+    from programmify import SubprocessWidget
+    from programmify.instrumentation import Instrumentation
+    from programmify import ansi
+
+    # the offscreen platform warns about every window feature it does not support
+    QtCore.qInstallMessageHandler(lambda *args: None)
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    cmd = [sys.executable, "-u", __file__, "--child"]
+    for key in child_options:
+        cmd.extend([f"--{key}", str(params[key])])
+    written = {}
+    unpainted = []
+    painted = {}
+    state = {"exited": False, "last_paint": None}
+
+    if widget_kw.get("rules"):
+        # a json file with a list of rules, see programmify.output_rules
+        widget_kw = dict(widget_kw, rules=json.loads(Path(widget_kw["rules"]).read_text()))
+    widget = SubprocessWidget(cmd, stay_open=True, name="benchmark", **widget_kw)
+    view = widget.output_display
+    append_lines = view.append_lines
+
+    def recording_append_lines(lines):
+        # every line reaches the display through append_lines, note which ones wait for the next paint
+        for line in lines:
+            if "\x1b" in line:
+                # highlighted by a rule
+                line = ansi.escape_pattern.sub("", line)
+            seq, _, rest = line.strip().partition(" ")
+            if seq.isdigit():
+                written[int(seq)] = float(rest.split(" ", 1)[0])
+                unpainted.append(int(seq))
+        append_lines(lines)
+
+    view.append_lines = recording_append_lines
+
+    class PaintFilter(QtCore.QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QtCore.QEvent.Paint and unpainted:
+                now = time.time()
+                for seq in unpainted:
+                    painted[seq] = now
+                unpainted.clear()
+                state["last_paint"] = now
+            return False
+
+    paint_filter = PaintFilter()
+    view.viewport().installEventFilter(paint_filter)
+
+    instrumentation = Instrumentation(stall_threshold=stall_ms)
+    instrumentation.watch(widget)
+
+    def on_exit(code):
+        state["exited"] = True
+        # the last batch was appended before the exit was signalled, paint it now
+        view.viewport().repaint()
+        QtCore.QTimer.singleShot(0, app.quit)
+
+    widget.process_thread.exit_signal.connect(on_exit)
+    QtCore.QTimer.singleShot(int(timeout * 1000), app.quit)
+    widget.show()
+    start = time.time()
+    app.exec_()
+    instrumentation.close()
+    widget.process_thread.wait()
+
+    latencies = [(painted[seq] - written[seq]) * 1000 for seq in painted]
+    first_write = min(written.values()) if written else start
+    duration = (state["last_paint"] or time.time()) - first_write
+    stalls = [stall["ms"] for stall in instrumentation.stalls]
+    return {
+        "params": params,
+        "widget": widget_kw,
+        "completed": state["exited"],
+        "lines_expected": params["lines"],
+        "lines_rendered": len(painted),
+        "seconds": duration,
+        "lines_per_second": len(painted) / duration if duration > 0 else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) if latencies else None,
+            "p90": percentile(latencies, 90) if latencies else None,
+            "p99": percentile(latencies, 99) if latencies else None,
+            "max": max(latencies) if latencies else None,
+            "mean": statistics.mean(latencies) if latencies else None,
+        },
+        "stalls": {"threshold_ms": stall_ms, "count": len(stalls), "total_ms": sum(stalls),
+                   "max_ms": max(stalls) if stalls else 0.0},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure(name: str, params: dict, widget_kw: dict, stall_ms: float, timeout: float) -> dict:
+    """Run one scenario in a fresh interpreter, so its peak RSS is its own."""
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "result.json"
+        cmd = [sys.executable, __file__, "--run", str(out), "--stall_ms", str(stall_ms), "--timeout", str(timeout)]
+        for key, value in list(params.items()) + list(widget_kw.items()):
+            cmd.extend([f"--{key}", str(value)])
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+        subprocess.run(cmd, env=env, check=True, timeout=timeout + 60)
+        result = json.loads(out.read_text())
+    result["scenario"] = name
+    return result
+
+
+def versions() -> dict:
+    from importlib import metadata
+    try:
+        programmify_version = metadata.version("programmify")
+    except metadata.PackageNotFoundError:
+        programmify_version = None
+    from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+    return {"programmify": programmify_version, "python": sys.version, "qt": QT_VERSION_STR, "pyqt": PYQT_VERSION_STR,
+            "platform": sys.platform}
+
+
+def print_result(r: dict):
+    lat = r["latency_ms"]
+    fmt = lambda v, unit: f"{v:9.1f}{unit}" if v is not None else f"{'-':>9}{unit}"
+    print(f"{r['scenario']:<12} {r['lines_rendered']:>7}/{r['lines_expected']:<7} "
+          f"{fmt(r['lines_per_second'], ' lines/s')}  latency p50 {fmt(lat['p50'], 'ms')} p99 {fmt(lat['p99'], 'ms')}"
+          f"  stalls {r['stalls']['count']:>3} ({r['stalls']['total_ms']:.0f}ms, max {r['stalls']['max_ms']:.0f}ms)"
+          f"  rss {fmt(r['peak_rss_mb'], 'MB')}{'' if r['completed'] else '  TIMED OUT'}")
+
+
+def compare(results: dict, baseline: dict):
+    """Print the change of every headline number against a previous run."""
+    metrics = {"lines/s": lambda r: r["lines_per_second"], "p50 ms": lambda r: r["latency_ms"]["p50"],
+               "p99 ms": lambda r: r["latency_ms"]["p99"], "stall ms": lambda r: r["stalls"]["total_ms"],
+               "rss MB": lambda r: r["peak_rss_mb"]}
+    print(f"\nCompared to {baseline['versions'].get('programmify')} ({baseline.get('date')})")
+    for name, r in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        changes = []
+        for label, get in metrics.items():
+            new_value, old_value = get(r), get(old)
+            if new_value is None or not old_value:
+                continue
+            changes.append(f"{label} {old_value:.1f} -> {new_value:.1f} ({100 * (new_value - old_value) / old_value:+.0f}%)")
+        print(f"  {name:<12} " + ", ".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="*", choices=list(scenarios), help="Scenarios to run, all by default")
+    for key in child_options:
+        parser.add_argument(f"--{key}", type=float if key in ("rate", "stderr_ratio", "burst_interval") else int,
+                            help=f"Override the {key} of every scenario")
+    for key, default in widget_options.items():
+        parser.add_argument(f"--{key}", type=int, default=default, help=f"SubprocessWidget {key}")
+    parser.add_argument("--rules", help="JSON file with a list of output rules to apply (see programmify.output_rules)")
+    parser.add_argument("--stall_ms", type=float, default=50, help="Event loop delays longer than this count as stalls")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for each scenario")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Results of a previous run (--json) to compare against")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--run", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    overrides = {key: getattr(args, key) for key in child_options if getattr(args, key) is not None}
+    widget_kw = {key: getattr(args, key) for key in widget_options}
+    if args.rules:
+        widget_kw["rules"] = str(Path(args.rules).resolve())
+
+    if args.child:
+        child(**overrides)
+        return
+    if args.run:
+        result = run_scenario(overrides, widget_kw, args.stall_ms, args.timeout)
+        Path(args.run).write_text(json.dumps(result))
+        return
+
+    results = {}
+    for name in args.scenarios or scenarios:
+        results[name] = measure(name, dict(scenarios[name], **overrides), widget_kw, args.stall_ms, args.timeout)
+        print_result(results[name])
+    report = {"date": time.strftime("%Y-%m-%d %H:%M:%S"), "versions": versions(), "results": results}
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    if args.compare:
+        compare(results, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == '__main__':
+    main()
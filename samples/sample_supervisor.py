@@ -0,0 +1,22 @@
+import sys
+import time
+
+from programmify import SupervisorWidget
+
+
+def sample(start, stop, interval=1):
+    for i in range(start, stop):
+        print(i)
+        time.sleep(interval)
+
+
+if __name__ == '__main__':
+    if "--run" in sys.argv:
+        start = int(sys.argv[1])
+        stop = int(sys.argv[2])
+        interval = int(sys.argv[3])
+        sample(start, stop, interval)
+    else:
+        cmds = {f"counter {i}": [sys.executable, "-u", __file__, str(i * 100), str(i * 100 + 200), '1', "--run"]
+                for i in range(5)}
+        SupervisorWidget.run(cmds, stay_open=True)
@@ -1,2 +1,41 @@
-from .programmify import Programmify, ProgrammifyMainWindow, ProgrammifyWidget, build, main, png2ico, png_to_ico, detect_main_file, detect_icon
-from .subprocess_program import SubprocessWidget
\ No newline at end of file
+# Attributes are imported on first access so that the command line tools (`programmify`, `png2ico`) and scripts that
+# only build do not pay for importing PyQt5. The imports are written out (rather than using importlib) so PyInstaller
+# still finds every submodule when analysing a program that uses programmify.
+__all__ = ["Programmify", "ProgrammifyMainWindow", "ProgrammifyWidget", "build", "main", "png2ico", "png_to_ico",
+           "detect_main_file", "detect_icon", "build_many", "build_batch", "SubprocessWidget", "SupervisorWidget",
+           "LogView", "Instrumentation", "find_entry_points", "async_slot"]
+
+
+def __getattr__(name):
+    if name in ("build", "png2ico", "png_to_ico", "detect_main_file", "detect_icon"):
+        from . import builder
+        return getattr(builder, name)
+    if name in ("build_many", "build_batch"):
+        from . import batch
+        return getattr(batch, name)
+    if name in ("Programmify", "ProgrammifyMainWindow", "ProgrammifyWidget", "main"):
+        from . import programmify
+        return getattr(programmify, name)
+    if name == "SubprocessWidget":
+        from .subprocess_program import SubprocessWidget
+        return SubprocessWidget
+    if name == "SupervisorWidget":
+        from .supervisor import SupervisorWidget
+        return SupervisorWidget
+    if name == "LogView":
+        from .log_view import LogView
+        return LogView
+    if name == "find_entry_points":
+        from .project_index import find_entry_points
+        return find_entry_points
+    if name == "async_slot":
+        from .async_loop import async_slot
+        return async_slot
+    if name == "Instrumentation":
+        from .instrumentation import Instrumentation
+        return Instrumentation
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,117 @@
+"""Split text with ANSI escape sequences into runs of plain text and the style they are displayed in.
+
+Only SGR sequences (`ESC[...m`: colors, bold, italic, underline, strikethrough) change the style, every other control
+sequence (cursor movement, erase line, ...) is removed from the text.
+"""
+import re
+from collections import namedtuple
+
+# CSI sequences (ESC [ parameters final byte), and the two character escapes some tools emit (e.g. ESC(B)
+escape_pattern = re.compile(r"\x1b(?:\[([0-9;:?]*)([@-~])|[()][0-9A-Za-z]|[@-Z\\-_])")
+
+# colors are (r, g, b) tuples, None is the default color of the display
+Style = namedtuple("Style", ["fg", "bg", "bold", "italic", "underline", "strike", "inverse"])
+plain = Style(None, None, False, False, False, False, False)
+
+# the 16 standard colors (normal, then bright), readable on the dark background of SubprocessWidget
+palette = [
+    (0, 0, 0), (205, 49, 49), (13, 188, 121), (229, 229, 16), (36, 114, 200), (188, 63, 188), (17, 168, 205),
+    (229, 229, 229), (102, 102, 102), (241, 76, 76), (35, 209, 139), (245, 245, 67), (59, 142, 234), (214, 112, 214),
+    (41, 184, 219), (255, 255, 255),
+]
+
+
+def color_256(n: int) -> tuple:
+    """The color of index `n` of the xterm 256 color palette."""
+    if n < 16:
+        return palette[n]
+    if n < 232:
+        n -= 16
+        levels = [0, 95, 135, 175, 215, 255]
+        return levels[n // 36], levels[n // 6 % 6], levels[n % 6]
+    gray = 8 + (n - 232) * 10
+    return gray, gray, gray
+
+
+def _extended_color(params: list, i: int, current):
+    """The color of `38;5;n` or `38;2;r;g;b` starting at params[i] (the 5 or 2), and the index after it. An incomplete
+    color leaves the `current` color unchanged and ends the sequence:
+
+    >>> apply_sgr(apply_sgr(plain, "31"), "1;38;2;255").fg
+    (205, 49, 49)
+    >>> apply_sgr(apply_sgr(plain, "31"), "48;5").bg is None
+    True
+    """
+    try:
+        if params[i] == 5:
+            return color_256(params[i + 1] % 256), i + 2
+        if params[i] == 2 and len(params) >= i + 4:
+            return tuple(min(255, v) for v in params[i + 1:i + 4]), i + 4
+    except IndexError:
+        pass
+    return current, len(params)
+
+
+def apply_sgr(style: Style, codes: str) -> Style:
+    """`style` after the SGR sequence `ESC[{codes}m`."""
+    params = [int(p) if p.isdigit() else 0 for p in codes.replace(":", ";").split(";")]
+    fg, bg, bold, italic, underline, strike, inverse = style
+    i = 0
+    while i < len(params):
+        code = params[i]
+        i += 1
+        if code == 0:
+            fg, bg, bold, italic, underline, strike, inverse = plain
+        elif code == 1:
+            bold = True
+        elif code == 3:
+            italic = True
+        elif code == 4:
+            underline = True
+        elif code == 7:
+            inverse = True
+        elif code == 9:
+            strike = True
+        elif code == 22:
+            bold = False
+        elif code == 23:
+            italic = False
+        elif code == 24:
+            underline = False
+        elif code == 27:
+            inverse = False
+        elif code == 29:
+            strike = False
+        elif 30 <= code <= 37:
+            fg = palette[code - 30]
+        elif 90 <= code <= 97:
+            fg = palette[code - 90 + 8]
+        elif 40 <= code <= 47:
+            bg = palette[code - 40]
+        elif 100 <= code <= 107:
+            bg = palette[code - 100 + 8]
+        elif code == 38:
+            fg, i = _extended_color(params, i, fg)
+        elif code == 48:
+            bg, i = _extended_color(params, i, bg)
+        elif code == 39:
+            fg = None
+        elif code == 49:
+            bg = None
+    return Style(fg, bg, bold, italic, underline, strike, inverse)
+
+
+def split_runs(text: str, style: Style = plain):
+    """Split `text` into [(text, Style)] and return them with the style in effect at the end, which carries over to
+    the text that follows."""
+    runs = []
+    start = 0
+    for match in escape_pattern.finditer(text):
+        if match.start() > start:
+            runs.append((text[start:match.start()], style))
+        if match.group(2) == "m":
+            style = apply_sgr(style, match.group(1))
+        start = match.end()
+    if start < len(text):
+        runs.append((text[start:], style))
+    return runs, style
@@ -0,0 +1,187 @@
+"""Run asyncio on the GUI thread, sharing it with the Qt event loop.
+
+`QtEventLoop` is a regular `asyncio.SelectorEventLoop` whose selector waits by running a Qt event loop instead of
+blocking in select(): the file descriptors asyncio waits on get a QSocketNotifier and the asyncio timeout becomes a
+QTimer, so Qt events (input, paint, queued signals) and asyncio callbacks are handled as they come, in one thread.
+The loop is started from inside `QApplication.exec_()`, which keeps `aboutToQuit` and the exit code working as usual.
+
+While a modal dialog runs its own event loop (`QDialog.exec_()`), asyncio callbacks wait for it to close. On Windows
+only sockets can be waited on (no pipes or subprocesses), as with any selector event loop there.
+"""
+import asyncio
+import functools
+import math
+import selectors
+import sys
+
+from PyQt5 import QtCore, QtWidgets
+
+
+class QtSelector(selectors.BaseSelector):
+    """A selector that handles Qt events while it waits, see the module docstring."""
+
+    def __init__(self, on_quit=None):
+        self._selector = selectors.DefaultSelector()
+        self._notifiers = {}
+        self._event_loop = QtCore.QEventLoop()
+        self._timer = QtCore.QTimer()
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(QtCore.Qt.PreciseTimer)
+        self._timer.timeout.connect(self._wake)
+        self._woken = False
+        self._waiting = False
+        self._on_quit = on_quit
+        # False once the QApplication has exited, from then on this is a plain selector
+        self.qt_active = True
+
+    def register(self, fileobj, events, data=None):
+        key = self._selector.register(fileobj, events, data)
+        self._update_notifiers(key.fd, events)
+        return key
+
+    def unregister(self, fileobj):
+        key = self._selector.unregister(fileobj)
+        self._update_notifiers(key.fd, 0)
+        return key
+
+    def modify(self, fileobj, events, data=None):
+        key = self._selector.modify(fileobj, events, data)
+        self._update_notifiers(key.fd, events)
+        return key
+
+    def _update_notifiers(self, fd, events):
+        notifiers = self._notifiers.setdefault(fd, {})
+        for event, kind in ((selectors.EVENT_READ, QtCore.QSocketNotifier.Read),
+                            (selectors.EVENT_WRITE, QtCore.QSocketNotifier.Write)):
+            if events & event and event not in notifiers:
+                notifier = QtCore.QSocketNotifier(fd, kind)
+                notifier.activated.connect(self._wake)
+                notifiers[event] = notifier
+            elif not events & event and event in notifiers:
+                notifier = notifiers.pop(event)
+                notifier.setEnabled(False)
+                notifier.deleteLater()
+        if not notifiers:
+            del self._notifiers[fd]
+
+    def _wake(self, *args):
+        self._woken = True
+        self._event_loop.exit(0)
+
+    def wake(self):
+        """Stop waiting, e.g. because a Qt slot scheduled an asyncio callback."""
+        if self._waiting:
+            self._wake()
+
+    def select(self, timeout=None):
+        if not self.qt_active:
+            return self._selector.select(timeout)
+        ready = self._selector.select(0)
+        if ready or timeout is not None and timeout <= 0:
+            # asyncio has work to do right away, still let Qt handle what is pending so the GUI stays responsive
+            QtCore.QCoreApplication.processEvents()
+            return ready or self._selector.select(0)
+        if timeout is not None:
+            self._timer.start(math.ceil(timeout * 1000))
+        self._woken = False
+        self._waiting = True
+        try:
+            code = self._event_loop.exec_()
+        finally:
+            self._waiting = False
+            self._timer.stop()
+        if not self._woken or code != 0:
+            # QApplication.exit() ended every running event loop, including this one
+            self.qt_active = False
+            if self._on_quit is not None:
+                self._on_quit()
+        return self._selector.select(0)
+
+    def close(self):
+        for notifiers in self._notifiers.values():
+            for notifier in notifiers.values():
+                notifier.setEnabled(False)
+                notifier.deleteLater()
+        self._notifiers.clear()
+        self._timer.stop()
+        self._selector.close()
+
+    def get_key(self, fileobj):
+        return self._selector.get_key(fileobj)
+
+    def get_map(self):
+        return self._selector.get_map()
+
+
+class QtEventLoop(asyncio.SelectorEventLoop):
+    """An asyncio event loop running inside the Qt event loop of `app`.
+
+    `exec_()` replaces `app.exec_()`: it runs both until the application quits, then cancels the tasks still running and
+    closes the loop.
+    """
+
+    def __init__(self, app: QtCore.QCoreApplication = None):
+        self.app = app or QtWidgets.QApplication.instance()
+        super().__init__(QtSelector(on_quit=self._qt_quit))
+
+    def _qt_quit(self):
+        self.stop()
+
+    # callbacks scheduled from Qt slots (which run while the selector waits) must not wait for the previous timeout
+    def call_soon(self, callback, *args, context=None):
+        handle = super().call_soon(callback, *args, context=context)
+        self._selector.wake()
+        return handle
+
+    def call_at(self, when, callback, *args, context=None):
+        handle = super().call_at(when, callback, *args, context=context)
+        self._selector.wake()
+        return handle
+
+    def exec_(self) -> int:
+        QtCore.QTimer.singleShot(0, self.run_forever)
+        try:
+            return self.app.exec_()
+        finally:
+            self._selector.qt_active = False
+            self.shutdown()
+
+    def shutdown(self, timeout: float = 5):
+        """Cancel the remaining tasks and give them `timeout` seconds to finish, then close the loop."""
+        if self.is_closed():
+            return
+        tasks = [task for task in asyncio.all_tasks(self) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.run_until_complete(asyncio.wait(tasks, timeout=timeout))
+        self.run_until_complete(self.shutdown_asyncgens())
+        self.close()
+
+
+# tasks started by async_slot, asyncio only keeps weak references to running tasks
+_slot_tasks = set()
+
+
+def async_slot(func):
+    """Let an `async def` function or method be connected to a Qt signal: every call starts it as a task on the running
+    QtEventLoop. Exceptions are printed, as Qt does for exceptions in slots.
+
+    >>> self.button.clicked.connect(self.fetch)
+    >>> @async_slot
+    ... async def fetch(self, checked=False):
+    ...     reader, writer = await asyncio.open_connection("example.com", 80)
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        task = asyncio.ensure_future(func(*args, **kwargs))
+        _slot_tasks.add(task)
+        task.add_done_callback(_slot_done)
+        return task
+    return wrapper
+
+
+def _slot_done(task):
+    _slot_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        sys.excepthook(type(task.exception()), task.exception(), task.exception().__traceback__)
@@ -0,0 +1,154 @@
+import argparse
+import contextlib
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from programmify.builder import _build, detect_main_file, get_defaults
+
+
+def expand_targets(files: list, names: list = None, versions: list = None, modes: list = None, **kw) -> list:
+    """Every combination of files x names x versions x modes as a list of keyword arguments for `_build`.
+
+    Any other keyword arguments (icon, hidden_imports, extra_files, windowed, incremental, ...) are shared by all the
+    targets. If several modes are given the mode is added to the program name so the executables do not collide.
+    """
+    targets = []
+    for file, name, version, mode in itertools.product(files, names or [None], versions or [None], modes or [None]):
+        if name is None:
+            name = Path(file).stem
+            if name in ["__main__", "main"]:
+                name = Path(file).resolve().parent.name
+        if modes and len(modes) > 1:
+            name = f"{name} {mode}"
+        targets.append(dict(kw, file=file, name=name, version=version, mode=mode))
+    return targets
+
+
+def _build_target(target: dict) -> dict:
+    """Build one target in its own work directory, with all of its output going to a log file in that directory.
+
+    Incremental targets use their persistent project directory (see programmify.incremental), the others a temporary
+    directory that is removed after a successful build unless `cleanup` is False, and kept with its log otherwise.
+    """
+    from programmify import incremental as inc
+    target = dict(target)
+    temporary = False
+    if target.get("workdir"):
+        workdir = Path(target["workdir"])
+    elif target.get("incremental"):
+        workdir = inc.project_dir(target["file"], target["name"], target.get("mode"))
+    else:
+        # not the project directory, the cleanup of a full build would delete the cache of its incremental builds
+        workdir = Path(tempfile.mkdtemp(prefix="programmify-build-"))
+        temporary = True
+    workdir.mkdir(parents=True, exist_ok=True)
+    log = workdir / "build.log"
+    log.write_text("")
+    target.update(workdir=str(workdir), log=str(log))
+    start = time.perf_counter()
+    result = {"file": target["file"], "name": target["name"], "version": target.get("version"),
+              "mode": target.get("mode"), "log": str(log)}
+    try:
+        with open(log, "a") as f, contextlib.redirect_stdout(f):
+            artifact = _build(**target)
+        result.update(ok=True, artifact=str(artifact), error=None)
+        if temporary and target.get("cleanup", True):
+            shutil.rmtree(workdir, ignore_errors=True)
+            result["log"] = None
+    except BaseException as e:
+        # _build reports failures with sys.exit, keep going with the other targets
+        result.update(ok=False, artifact=None, error=f"{type(e).__name__}: {e}")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def build_many(targets: list, jobs: int = None) -> list:
+    """Build many targets (see `expand_targets`) in parallel, each in its own work directory and process.
+
+    Returns a list of results, one per target in the order they finished, each with `ok`, `artifact`, `error`,
+    `seconds` and the `log` file of the build.
+    """
+    dsts = [str(t.get("dst") or Path.cwd() / f"{t['name']}{' v' + str(t['version']) if t.get('version') else ''}.exe")
+            for t in targets]
+    duplicates = {d for d in dsts if dsts.count(d) > 1}
+    if duplicates:
+        raise ValueError(f"Several targets would build the same executable: {', '.join(sorted(duplicates))}")
+    # detect (and maybe convert) the default icon once here instead of in every worker at the same time
+    targets = [dict(t, icon=t.get("icon") or get_defaults()["icon"]) for t in targets]
+    jobs = jobs or min(len(targets), os.cpu_count() or 1)
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [pool.submit(_build_target, target) for target in targets]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = "built" if result["ok"] else "FAILED"
+            print(f"{status} {result['name']} ({result['seconds']:.1f}s)")
+    return results
+
+
+def print_summary(results: list):
+    RED = "\033[91m"
+    GREEN = "\033[92m"
+    RESET = "\033[0m"
+    failed = [r for r in results if not r["ok"]]
+    print(f"\n{len(results) - len(failed)}/{len(results)} targets built")
+    for r in results:
+        if r["ok"]:
+            print(f"{GREEN}  ok{RESET}     {r['seconds']:7.1f}s  {r['name']} => {r['artifact']}")
+        else:
+            print(f"{RED}  failed{RESET} {r['seconds']:7.1f}s  {r['name']}: {r['error']} (see {r['log']})")
+
+
+def build_batch():
+    """Command line utility to build many programs at once. Example usage:
+        $: programmify-batch app.py tool.py
+        $: programmify-batch app.py --versions 1 2 --modes window widget --jobs 4
+        $: programmify-batch --all
+        $: programmify-batch --list
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("files", nargs="*", help="Files to build. If not specified, the main file is detected like `programmify` does.")
+    parser.add_argument("--all", action="store_true", help="Build every program found in the current working directory")
+    parser.add_argument("--list", action="store_true", help="List every program found in the current working directory and exit")
+    parser.add_argument("--ignore", nargs="*", help="Patterns of files and folders to skip when looking for programs, on top of .gitignore and .programmifyignore")
+    parser.add_argument("--names", nargs="*", help="Program names, every file is built under every name")
+    parser.add_argument("--versions", nargs="*", help="Versions, every program is built for every version")
+    parser.add_argument("--modes", nargs="*", help="Program modes (window or widget), every program is built in every mode")
+    parser.add_argument("--jobs", type=int, help="Number of builds to run at once, defaults to the number of cores")
+    parser.add_argument("--icon", help="Path to a .ico or .png file")
+    parser.add_argument("--hidden_imports", nargs="*", help="Hidden imports")
+    parser.add_argument("--extra-files", nargs="*", help="Extra files to include")
+    parser.add_argument("--debug", action="store_false", help="Does not run in windowed mode, instead shows the terminal and stdout", dest="windowed")
+    parser.add_argument("--nocleanup", action="store_false", help="Keep the work directory of every build", dest="cleanup")
+    parser.add_argument("--incremental", action="store_true", help="Skip targets that did not change since their last build")
+    parser.add_argument("--onedir", action="store_true", help="Build folders instead of single executables")
+    args = parser.parse_args()
+
+    if args.all or args.list:
+        from programmify.project_index import find_entry_points
+        entry_points = find_entry_points(ignore=args.ignore)
+        if args.list:
+            for entry_point in entry_points:
+                print(f"{entry_point.file}  ({entry_point.kind}: {', '.join(entry_point.classes)})")
+            return
+        if not entry_points:
+            print("No programs found")
+            sys.exit(1)
+        files = args.files + [e.file for e in entry_points if e.file not in args.files]
+    else:
+        files = args.files or [detect_main_file()]
+    targets = expand_targets(files, args.names, args.versions, args.modes, icon=args.icon,
+                             hidden_imports=args.hidden_imports, extra_files=args.extra_files,
+                             windowed=args.windowed, cleanup=args.cleanup, incremental=args.incremental,
+                             onedir=args.onedir)
+    results = build_many(targets, jobs=args.jobs)
+    print_summary(results)
+    if not all(r["ok"] for r in results):
+        sys.exit(1)
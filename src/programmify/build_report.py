@@ -0,0 +1,100 @@
+import contextlib
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+# pyinstaller log lines look like "1234 INFO: Building PYZ (ZlibArchive) ...", the number being ms since it started
+pyinstaller_line = re.compile(r"^(\d+) (\w+): (.*)$")
+pyinstaller_stage = re.compile(r"^(?:checking|Building) (Analysis|PYZ|PKG|EXE|COLLECT|BUNDLE)\b")
+
+
+class BuildReport:
+    """Timings and details of one build, see `_build(profile=True, report="out.json")`."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+        self.pyinstaller_stages = []
+        self.pyinstaller_warnings = 0
+        self.inputs = {}
+        self.artifact = None
+        self.size_breakdown = None
+        self.up_to_date = False
+        self.ok = False
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({"name": name, "seconds": time.perf_counter() - start})
+
+    def parse_pyinstaller_log(self, lines):
+        """Split pyinstaller's run into its analysis, PYZ, PKG, EXE (and COLLECT) stages using the log timestamps."""
+        starts = []
+        last_ms = 0
+        for line in lines:
+            match = pyinstaller_line.match(line.strip())
+            if not match:
+                continue
+            ms, level, message = int(match.group(1)), match.group(2), match.group(3)
+            last_ms = ms
+            if level == "WARNING":
+                self.pyinstaller_warnings += 1
+            stage = pyinstaller_stage.match(message)
+            if stage and stage.group(1).lower() not in [name for name, _ in starts]:
+                starts.append((stage.group(1).lower(), ms))
+        starts.insert(0, ("startup", 0))
+        ends = [ms for _, ms in starts[1:]] + [last_ms]
+        self.pyinstaller_stages = [{"name": name, "seconds": (end - start) / 1000}
+                                   for (name, start), end in zip(starts, ends)]
+
+    def set_artifact(self, path):
+        """Record the executable, or the program folder of a onedir build with the total size of its files."""
+        path = Path(path)
+        if path.is_dir():
+            size = sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+        else:
+            size = path.stat().st_size if path.exists() else None
+        self.artifact = {"path": str(path), "size": size}
+
+    def to_dict(self) -> dict:
+        from importlib import metadata
+        try:
+            pyinstaller_version = metadata.version("pyinstaller")
+        except metadata.PackageNotFoundError:
+            pyinstaller_version = None
+        return {
+            "ok": self.ok,
+            "up_to_date": self.up_to_date,
+            "total_seconds": time.perf_counter() - self.start,
+            "phases": self.phases,
+            "pyinstaller_stages": self.pyinstaller_stages,
+            "pyinstaller_warnings": self.pyinstaller_warnings,
+            "artifact": self.artifact,
+            "size_breakdown": self.size_breakdown,
+            "inputs": self.inputs,
+            "versions": {"python": sys.version, "pyinstaller": pyinstaller_version},
+        }
+
+    def write(self, path):
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2, default=str))
+
+    def print_summary(self):
+        d = self.to_dict()
+        print(f"\nBuild profile ({d['total_seconds']:.2f}s total)")
+        for phase in d["phases"]:
+            print(f"  {phase['name']:<24} {phase['seconds']:8.2f}s")
+            if phase["name"] == "pyinstaller":
+                for stage in d["pyinstaller_stages"]:
+                    print(f"    {stage['name']:<22} {stage['seconds']:8.2f}s")
+        if d["artifact"] and d["artifact"]["size"] is not None:
+            print(f"  artifact size            {d['artifact']['size'] / 1e6:8.2f}MB")
+
+
+def phase(report: BuildReport, name: str):
+    """`report.phase(name)`, or nothing when not profiling."""
+    return report.phase(name) if report is not None else contextlib.nullcontext()
@@ -0,0 +1,602 @@
+import argparse
+import contextlib
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from programmify.build_report import BuildReport, phase
+
+cfg_file = Path(__file__).parent / "programmify.cfg"
+# module generated by _build with the name, mode and icon of the program, compiled into the bundle
+config_module = "_programmify_config"
+programmify_icon = Path(__file__).parent / "favicon.ico"
+programmify_file = Path(__file__).parent / "programmify.py"
+
+# the defaults depend on the current working directory and the bundled config, they are looked up on first use so
+# importing programmify never scans the filesystem or converts icons
+_defaults = None
+
+# every size Windows and Qt ask for, so an icon built with all of them never has to be rescaled at runtime
+ico_sizes = (16, 24, 32, 48, 64, 128, 256)
+
+
+def cache_dir() -> Path:
+    """Per-user cache directory for programmify, override with the PROGRAMMIFY_CACHE_DIR environment variable."""
+    if os.environ.get("PROGRAMMIFY_CACHE_DIR"):
+        return Path(os.environ["PROGRAMMIFY_CACHE_DIR"]).expanduser()
+    if sys.platform == "win32":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+        return base / "programmify" / "Cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "programmify"
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "programmify"
+
+
+def png_to_ico(png_path: str, ico_path: str = None, size: int = 64, sizes: list = None, cache: bool = True):
+    """Convert a .png to a .ico containing `sizes` (or just `size`) and return the path of the .ico.
+
+    Conversions are cached by the content of the .png and the sizes requested, so converting the same image again
+    only copies the cached .ico (if it is not already in place) and does not need Pillow.
+    """
+    png_path = str(Path(png_path).resolve())
+    if ico_path is None:
+        # replace .png with .ico
+        ico_path = png_path[:-4] + ".ico"
+    sizes = sorted(set(sizes or [size]))
+    if not cache:
+        _save_ico(png_path, ico_path, sizes)
+        return ico_path
+
+    data = Path(png_path).read_bytes()
+    key = hashlib.sha256(data + repr(sizes).encode()).hexdigest()
+    cached = cache_dir() / "icons" / f"{key}.ico"
+    if not cached.exists():
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_name(f"{key}.{os.getpid()}.tmp.ico")
+        _save_ico(png_path, tmp, sizes)
+        os.replace(tmp, cached)
+    if not (Path(ico_path).exists() and Path(ico_path).read_bytes() == cached.read_bytes()):
+        # builds running in parallel may share the icon, none of them must see it half written
+        tmp = Path(ico_path).with_name(f"{Path(ico_path).stem}.{os.getpid()}.tmp.ico")
+        shutil.copyfile(cached, tmp)
+        os.replace(tmp, ico_path)
+    return ico_path
+
+
+def _save_ico(png_path, ico_path, sizes):
+    from PIL import Image
+    img = Image.open(png_path)
+    # Pillow renders every size from the full resolution image in one save
+    img.save(ico_path, format="ICO", sizes=[(s, s) for s in sizes])
+
+
+def png2ico():
+    """Command line utility to convert a .png file to a .ico file. Example usage:
+        $: png2ico favicon.png
+        $: png2ico favicon.png --size 32
+        $: png2ico favicon.png --ico_path favicon.ico --size 32
+        $: png2ico favicon.png --sizes 16 32 48
+        $: png2ico favicon.png --all_sizes
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument("png_path", help="Path to the .png file")
+    parser.add_argument("--ico_path", help="Path to the .ico file")
+    parser.add_argument("--size", type=int, default=64, help="Icon size")
+    parser.add_argument("--sizes", type=int, nargs="*", help="Include several icon sizes in the .ico")
+    parser.add_argument("--all_sizes", action="store_true", help=f"Include every standard icon size {ico_sizes}")
+    parser.add_argument("--nocache", action="store_false", help="Always convert, ignoring cached icons", dest="cache")
+    args = parser.parse_args()
+    sizes = ico_sizes if args.all_sizes else args.sizes
+    png_to_ico(args.png_path, args.ico_path, args.size, sizes=sizes, cache=args.cache)
+
+
+def detect_icon(folder=None):
+    """Detect the default icon for the folder (uses current working directory by default)."""
+    folder = Path.cwd() if folder is None else Path(folder).expanduser()
+    default_icon = None
+    # if there is a favicon.ico file in the current directory, use it
+    if (folder / "favicon.ico").exists():
+        default_icon = str((folder / "favicon.ico").resolve())
+    else:
+        # if there is exactly one .ico file in the current directory, use it
+        ico_files = list(folder.glob("*.ico"))
+        if len(ico_files) == 1:
+            default_icon = str(ico_files[0].resolve())
+        else:
+            # if there is only one .png file in the current directory, convert it to .ico and use it
+            png_files = list(folder.glob("*.png"))
+            if len(png_files) == 1:
+                try:
+                    default_icon = png_to_ico(png_files[0], sizes=ico_sizes)
+                except Exception as e:
+                    print(f"Failed to convert {png_files[0]} to .ico: {e}")
+            else:
+                # if there is no .ico file in the current directory, use the default icon
+                default_icon = None
+    return default_icon
+
+
+def write_config_module(folder, cfg: dict) -> Path:
+    """Write the config of a program as the python module `config_module` in `folder`, to be bundled by pyinstaller."""
+    path = Path(folder) / f"{config_module}.py"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(f"# generated by programmify when building {cfg.get('name')}, see programmify.builder.load_cfg\n"
+                    f"cfg = {cfg!r}\n")
+    return path
+
+
+def load_cfg() -> dict:
+    """Load the config bundled with a built program, empty if there is none."""
+    try:
+        # only importable inside a built program, it is bundled as bytecode so this parses nothing
+        cfg_module = __import__(config_module)
+    except ImportError:
+        pass
+    else:
+        return dict(cfg_module.cfg)
+    if not cfg_file.exists():
+        return {}
+    # a config file left in the package by older versions, yaml is imported by name so pyinstaller does not bundle it
+    import importlib
+    yaml = importlib.import_module("yaml")
+    with open(cfg_file) as f:
+        return yaml.safe_load(f) or {}
+
+
+def get_defaults() -> dict:
+    """Default name, mode and icon, from the bundled config or detected from the current working directory."""
+    global _defaults
+    if _defaults is None:
+        cfg = load_cfg()
+        icon = cfg.get("icon")
+        if icon is not None:
+            # bundled next to this module, see _build
+            icon = str(Path(__file__).parent / icon) if (Path(__file__).parent / icon).exists() else None
+        if icon is None:
+            # try to automatically find the default icon
+            icon = detect_icon() or detect_icon(Path(__file__).parent) or str(programmify_icon.resolve())
+        _defaults = {"name": cfg.get("name"), "mode": cfg.get("mode", "window"), "icon": icon}
+    return _defaults
+
+
+def __getattr__(name):
+    # default_name, default_mode and default_icon used to be computed at import time, keep them available lazily
+    if name in ("default_name", "default_mode", "default_icon"):
+        return get_defaults()[name[len("default_"):]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def detect_main_file(folder=None):
+    """Detect the main file to use for building the program.
+
+    The folder is indexed (see programmify.project_index) for files that run a Programmify program. The shallowest one
+    is used, if several are equally shallow main.py, __main__.py or <folder>.py. Folders without any are searched the
+    old way, for main.py, __main__.py or a single .py file.
+    """
+    folder = Path.cwd() if folder is None else Path(folder).expanduser()
+    from programmify.project_index import find_entry_points
+    entry_points = [Path(e.file) for e in find_entry_points(folder)]
+    if entry_points:
+        depth = len(entry_points[0].relative_to(folder.resolve()).parts)
+        shallowest = [f for f in entry_points if len(f.relative_to(folder.resolve()).parts) == depth]
+        preferred = [f for f in shallowest if f.name in ["main.py", "__main__.py", f"{folder.resolve().name}.py"]]
+        if len(shallowest) == 1 or len(preferred) == 1:
+            return str((preferred or shallowest)[0])
+        raise FileNotFoundError(f"Found several programs to build, please specify one of: {', '.join(map(str, shallowest))}")
+
+    # if there is only one .py file in the current directory, use it
+    py_files = list(folder.glob("*.py"))
+    py_files = [f for f in py_files if f.name != "__init__.py"]
+    if len(py_files) == 1:
+        return str(py_files[0].resolve())
+    for test_path in ["main.py", "__main__.py", f"{folder.name}.py"]:
+        if (folder / test_path).exists():
+            return str((folder / test_path).resolve())
+    if (folder / "src").exists():
+        if any((folder / "src").glob("*.py")):
+            return detect_main_file(folder / "src")
+        else:
+            possible_src_files = []
+            for f in (folder / "src").glob("*"):
+                if not f.is_dir():
+                    continue
+                try:
+                    main_file = detect_main_file(f)
+                    if main_file:
+                        possible_src_files.append(main_file)
+                except FileNotFoundError:
+                    pass
+            if len(possible_src_files) == 1:
+                return possible_src_files[0]
+    raise FileNotFoundError("Could not detect main file. Please specify the file to build, e.g. programmify build my_program.py")
+
+
+def build():
+    parser = argparse.ArgumentParser()
+    # if no file is given, _build detects it with detect_main_file
+    parser.add_argument("file", nargs="?", help="""File to build.
+    If not specified, will try ...
+        1. the file that runs a Programmify program (e.g. MyWidget.run()), found anywhere in the current working directory
+           (ignoring hidden folders, virtual environments and the patterns in .gitignore and .programmifyignore)
+        2. main.py in current working directory if found
+        3. __main__.py
+        4. the only .py file in the current working directory if only one is found (excluding __init__.py)
+        5. if there is a src directory, will search in src and its subdirectories to find a single option
+        6. if the above fails, will raise an error and you will need to specify the file to build.
+    """)
+    defaults = get_defaults()
+    parser.add_argument("--name", default=defaults["name"],
+                        help="Program name. If not specified, the name of the either the file or its parent directory will be used.")
+    parser.add_argument("--dst", help="Destination directory for the built program")
+    parser.add_argument("--icon", default=defaults["icon"],
+                        help="Path to a 16x16 .ico file. If not specified, will try to find favicon.ico or any other .ico or .png in the current working directory.")
+    parser.add_argument("--mode", default=defaults["mode"], help="Program mode: window or widget")
+    parser.add_argument("--nocleanup", action="store_false", help="Cleanup build files", dest="cleanup")
+    parser.add_argument("--show_cmd", action="store_true", help="Show the command that will be run instead of running it")
+    parser.add_argument("--cmd", help="Expert level: command to run instead of pyinstaller")
+    parser.add_argument("--hidden_imports", nargs="*", help="Hidden imports")
+    parser.add_argument("--extra-files", nargs="*", help="Extra files to include")
+    parser.add_argument("--debug", action="store_false", help="Does not run in windowed mode, instead shows the terminal and stdout", dest="windowed")
+    parser.add_argument("--args", nargs=argparse.REMAINDER, help="Additional arguments to pass to pyinstaller")
+    parser.add_argument("--desktop", action="store_true", help="Copy the file to the desktop")
+    parser.add_argument("--version", help="Adds the version string to the end of the program name. e.g. --version 1 => my_program v1")
+    parser.add_argument("--incremental", action="store_true", help="Skip the build if nothing changed since the last one, otherwise rebuild reusing a persistent work directory")
+    parser.add_argument("--workdir", help="Directory for pyinstaller's work files and the generated config, instead of the current working directory")
+    parser.add_argument("--onedir", action="store_true", help="Build a folder with the executable and its files instead of a single file, which starts faster because nothing is unpacked on launch")
+    parser.add_argument("--profile", action="store_true", help="Time every phase of the build and print a summary")
+    parser.add_argument("--report", help="Write the timings, inputs and artifact size of the build to this .json file")
+    parser.add_argument("--optimize", action="store_true", help="Exclude the Qt modules and packages the program does not import, strip Qt translations and unused plugins, and print the size of the result per package")
+
+    args = parser.parse_args()
+    _build(file=args.file, name=args.name, dst=args.dst, version=args.version,
+           icon=args.icon, mode=args.mode, cleanup=args.cleanup,
+           hidden_imports=args.hidden_imports, extra_files=args.extra_files, windowed=args.windowed,
+           cmd=args.cmd, args=args.args, desktop=args.desktop, show_cmd=args.show_cmd, incremental=args.incremental,
+           workdir=args.workdir, onedir=args.onedir, profile=args.profile, report=args.report,
+           optimize=args.optimize)
+
+
+def _build(file: str = None,
+           name: str = None,
+           dst: str = None,
+           version: str = None,
+           icon: str = None,
+           mode: str = None,
+           args: list = None,
+           cmd: list = None,
+           hidden_imports: list = None,
+           extra_files: list = None,
+           windowed: bool = True,
+           cleanup: bool = True,
+           show_cmd: bool = False,
+           desktop: bool = False,
+           incremental: bool = False,
+           workdir: str = None,
+           log: str = None,
+           onedir: bool = False,
+           profile: bool = False,
+           report: str = None,
+           optimize: bool = False
+           ):
+    """Build `file` into an executable with pyinstaller.
+
+    With `incremental` the build inputs are fingerprinted (see programmify.incremental): if nothing changed since the
+    last build of the same file, name and mode, the existing executable is returned without running pyinstaller,
+    otherwise pyinstaller runs in a persistent per-project work directory so its analysis cache is reused.
+
+    With `workdir` the generated config, pyinstaller's work files, spec and dist all go in that directory instead of the
+    temporary directory and the current working directory, so builds with different work directories can run at the same
+    time. If `cleanup` is set and the build is not incremental, what the build wrote there (config, build, dist and the
+    spec) is deleted afterwards, and the directory itself only if the build created it and it is left empty.
+
+    `log` is a file that receives pyinstaller's output instead of the console.
+
+    With `onedir` pyinstaller builds a folder instead of a single executable: launching it does not have to unpack
+    Python and Qt to a temporary directory first. The folder is moved next to `dst`, named after the program, and the
+    executable inside it is returned.
+
+    With `profile` the time spent in every phase of the build (including pyinstaller's own stages, parsed from its
+    log) is printed at the end, `report` is a .json file to write those timings, the resolved inputs and the size of
+    the executable to. The report is written even if the build fails.
+
+    With `optimize` the PyQt5 modules and packages the program does not import are excluded, Qt's translations and
+    unused image format plugins are stripped (see programmify.optimize) and the size of the artifact per package is
+    printed and added to the report.
+    """
+    build_report = BuildReport() if (profile or report) else None
+    failed = False
+    # the temporary directory of the generated config, without a work directory
+    config_tmp = None
+    try:
+        defaults = get_defaults()
+        name = defaults["name"] if name is None else name
+        icon = defaults["icon"] if icon is None else icon
+        mode = defaults["mode"] if mode is None else mode
+        if file is None:
+            with phase(build_report, "detect main file"):
+                file = detect_main_file()
+        print(f"Building {file} as {name} with icon {icon}")
+        if file in [".", "__file__"]:
+            file = str(programmify_file)
+        if name is None:
+            name = Path(file).stem
+            if name in ["__main__", "main"]:
+                name = Path(file).parent.name
+        if version:
+            name = f"{name} v{version}"
+
+        if dst is None:
+            dst = Path.cwd() / f"{name}.exe"
+        dst = Path(dst).expanduser()
+        if onedir:
+            # the program folder goes where the single file would have, the executable keeps its name inside it
+            dst = dst.parent / dst.stem / dst.name
+
+        if isinstance(hidden_imports, str):
+            hidden_imports = [v.strip() for v in hidden_imports.replace(" ", ",").split(",")]
+        if isinstance(extra_files, str):
+            extra_files = [v.strip() for v in extra_files.replace(" ", ",").split(",")]
+
+        if icon.endswith(".png"):
+            with phase(build_report, "icon conversion"):
+                icon = png_to_ico(icon, sizes=ico_sizes)
+
+        # a onedir build creates a folder named after the file, keep it away from any folder in the destination
+        distpath = Path("dist").resolve() if onedir else dst.parent.resolve()
+        if incremental:
+            from programmify import incremental as inc
+            if workdir is None:
+                workdir = inc.project_dir(file, name, mode)
+        if workdir is not None:
+            workdir = Path(workdir).expanduser().resolve()
+            created_workdir = not workdir.exists()
+            workdir.mkdir(parents=True, exist_ok=True)
+            # the spec file lives in the work directory, so every path given to pyinstaller must be absolute
+            file = str(Path(file).resolve())
+            icon = str(Path(icon).resolve())
+            extra_files = [str(Path(extra_file).resolve()) for extra_file in extra_files or []]
+            config_dir = workdir / "config"
+            distpath = workdir / "dist"
+        elif show_cmd:
+            # only printing the command, where the config would be generated
+            config_dir = Path(tempfile.gettempdir()) / "programmify-config"
+        else:
+            # not under ./build, which must not exist yet when the build cleans up after itself
+            config_tmp = config_dir = Path(tempfile.mkdtemp(prefix="programmify-config-"))
+
+        # generate the config of the program
+        # the icon is bundled into the programmify folder, the program finds it there by name
+        cfg = {"name": name, "mode": mode, "icon": Path(icon).name}
+        if show_cmd and workdir is None:
+            print(f"config to generate in {config_dir}: {cfg}")
+        else:
+            with phase(build_report, "config generation"):
+                cfg_path = write_config_module(config_dir, cfg)
+            print(f"generated {cfg_path}: {cfg_path.read_text()}")
+        if cmd is None:
+            cmd = ["pyinstaller", "--onedir" if onedir else "--onefile", "--windowed",
+                   "--distpath", str(distpath),
+                   f"--icon={icon}", "--add-data", f"{icon};programmify",
+                   "--add-data", f"{Path(__file__).parent / 'subprocess_program.py'};programmify",
+                   "--add-data", f"{programmify_file};.",
+                   "--paths", str(config_dir),
+                   "--hidden-import", config_module,
+                   "--hidden-import", "setproctitle"]
+            if not windowed:
+                cmd.remove("--windowed")
+            for extra_file in extra_files or []:
+                cmd.extend(["--add-data", f"{extra_file};."])
+            for hidden_import in hidden_imports or []:
+                cmd.extend(["--hidden-import", hidden_import])
+            if workdir is not None:
+                cmd.extend(["--workpath", str(workdir / "build"), "--specpath", str(workdir)])
+            if optimize:
+                from programmify import optimize as opt
+                with phase(build_report, "optimize"):
+                    for module in opt.excludes(file, keep=hidden_imports):
+                        cmd.extend(["--exclude-module", module])
+            cmd.append(file)
+        if args:
+            cmd.extend(args)
+        src = distpath / Path(file).stem if onedir else distpath / f"{Path(file).stem}.exe"
+        if build_report is not None:
+            build_report.inputs = {
+                "file": str(Path(file).resolve()), "name": name, "mode": mode, "icon": icon, "dst": str(dst),
+                "windowed": windowed, "onedir": onedir, "hidden_imports": hidden_imports or [], "extra_files": extra_files or [],
+                "incremental": incremental, "workdir": str(workdir) if workdir else None, "optimize": optimize,
+                "cmd": cmd,
+            }
+            from programmify.incremental import local_imports
+            build_report.inputs["local_imports"] = [str(p) for p in local_imports(file)]
+        if show_cmd:
+            return _build_from_cmd(cmd, src, dst, show_cmd=True)
+
+        if incremental:
+            with phase(build_report, "fingerprint"):
+                digest = inc.fingerprint(cmd, file)
+                up_to_date = inc.is_up_to_date(workdir, digest, dst)
+            if up_to_date:
+                print(f"{dst} is up to date")
+                if build_report is not None:
+                    build_report.up_to_date = True
+                    build_report.set_artifact(dst.parent if onedir else dst)
+                if desktop:
+                    _copy_to_desktop(dst, onedir)
+                return dst
+        if optimize:
+            with phase(build_report, "spec generation"):
+                cmd = opt.write_spec(cmd, workdir or Path.cwd(), file)
+        # with a work directory nothing outside of it needs cleaning up
+        dst = _build_from_cmd(cmd, src, dst, cleanup=cleanup and workdir is None, desktop=desktop, log=log,
+                              report=build_report)
+        if workdir is not None:
+            with phase(build_report, "cleanup"):
+                if incremental:
+                    # the work directory is kept so the next build can reuse pyinstaller's cache
+                    inc.record_build(workdir, digest, dst)
+                elif cleanup:
+                    _clean_workdir(workdir, Path(file).stem, remove=created_workdir)
+        if optimize:
+            with phase(build_report, "size breakdown"):
+                breakdown = opt.size_breakdown(dst.parent if onedir else dst)
+            opt.print_size_breakdown(breakdown)
+            if build_report is not None:
+                build_report.size_breakdown = breakdown
+        return dst
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        if config_tmp is not None:
+            shutil.rmtree(config_tmp, ignore_errors=True)
+        if build_report is not None:
+            build_report.ok = not failed
+            if report:
+                build_report.write(report)
+            if profile:
+                build_report.print_summary()
+
+
+def _build_from_cmd(cmd: list,
+                    src,
+                    dst,
+                    cleanup: bool = True,
+                    show_cmd: bool = False,
+                    desktop: bool = False,
+                    log: str = None,
+                    report: BuildReport = None
+                    ):
+
+    if isinstance(cmd, str):
+        cmd = [v.strip() for v in cmd.split(" ") if v.strip()]
+    if show_cmd:
+        print(" ".join(cmd))
+        return cmd
+    import shutil
+    import subprocess
+
+    # preclean
+    if cleanup and Path("build").exists():
+        raise Exception("Build directory exists. Please remove it before building or use flag --nocleanup. Trying to avoid deleting files that you may want to keep.")
+
+    # verify the name is not already a valid command
+    if shutil.which(dst.stem) and not dst.exists():
+        RED = "\033[91m"
+        BOLD = "\033[1m"
+        RESET = "\033[0m"
+        print(f"{RED}{BOLD}{dst.stem}{RESET}{RED} is already a valid command. Please choose a different name{RESET}.")
+        sys.exit(1)
+
+    # build
+    try:
+        with phase(report, "pyinstaller"):
+            if report is not None:
+                # pass the output through while keeping it to split pyinstaller's run into stages
+                lines = []
+                with open(log, "a") if log else contextlib.nullcontext(sys.stdout) as out:
+                    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                                               errors="replace")
+                    for line in process.stdout:
+                        out.write(line)
+                        lines.append(line)
+                report.parse_pyinstaller_log(lines)
+                if process.wait():
+                    raise subprocess.CalledProcessError(process.returncode, cmd)
+            elif log:
+                with open(log, "a") as f:
+                    subprocess.run(cmd, check=True, stdout=f, stderr=subprocess.STDOUT)
+            else:
+                subprocess.run(cmd, check=True)
+    except subprocess.CalledProcessError as e:
+        RED = "\033[91m"
+        BOLD = "\033[1m"
+        RESET = "\033[0m"
+        print(f"{RED}{BOLD}Failed to build {dst}{RESET}{RED}. Please check the error message above ^{RESET}.")
+        sys.exit(1)
+
+    print(f"Built {dst}")
+    # src is gone once it has been moved
+    onedir = Path(src).is_dir()
+    with phase(report, "move artifact"):
+        if onedir:
+            dst = _move_onedir(Path(src), Path(dst))
+        else:
+            shutil.move(src, dst)
+    if report is not None:
+        report.set_artifact(dst.parent if onedir else dst)
+    if desktop:
+        # copy the file to the desktop
+        with phase(report, "desktop copy"):
+            _copy_to_desktop(dst, onedir)
+
+    # cleanup
+    if cleanup:
+        with phase(report, "cleanup"):
+            shutil.rmtree("dist", ignore_errors=True)
+            shutil.rmtree("build", ignore_errors=True)
+            # remove all .spec files
+            spec_file = f"{Path(src.stem)}.spec"
+            if Path(spec_file).exists():
+                Path(spec_file).unlink()
+            if cfg_file.exists():
+                cfg_file.unlink()
+
+    print(f"Built {dst}")
+
+    GRAY = "\033[90m"
+    RESET = "\033[0m"
+
+    print(f"""Built {dst}
+    
+To run the program:
+    a. Open your File Explorer and double-click the file {dst}
+    b. Open a command prompt and run the command `{GRAY}{dst}{RESET}
+    c. In the command prompt if you are in the same directory as the file, you can run `{GRAY}{dst.stem}{RESET}`
+""")
+    return dst
+
+
+def _copy_to_desktop(dst: Path, onedir: bool = False):
+    """Copy the executable, or the whole program folder of a onedir build, to the desktop."""
+    import shutil
+    if onedir:
+        shutil.copytree(dst.parent, Path.home() / "Desktop" / dst.parent.name, dirs_exist_ok=True)
+    else:
+        shutil.copy(dst, Path.home() / "Desktop" / dst.name)
+
+
+def _clean_workdir(workdir: Path, stem: str, remove: bool = False):
+    """Delete what a build wrote to `workdir`, never anything else that is in it, and `workdir` itself if `remove` and
+    it is empty."""
+    import shutil
+    for folder in ("config", "build", "dist"):
+        shutil.rmtree(workdir / folder, ignore_errors=True)
+    spec = workdir / f"{stem}.spec"
+    if spec.exists():
+        spec.unlink()
+    if remove and not any(workdir.iterdir()):
+        workdir.rmdir()
+
+
+def _move_onedir(src: Path, dst: Path) -> Path:
+    """Move the folder of a onedir build to `dst.parent` and rename the executable in it to `dst.name`."""
+    import shutil
+    folder = dst.parent
+    if folder.exists():
+        # only replace a previous build, never some other folder that happens to have the program's name
+        if not ((folder / "_internal").exists() or dst.exists()):
+            raise Exception(f"{folder} exists and is not a previous build of this program. Please remove it or choose a different --dst.")
+        shutil.rmtree(folder)
+    shutil.move(str(src), str(folder))
+    exe = folder / f"{src.name}.exe"
+    if not exe.exists():
+        # no .exe suffix outside of Windows
+        exe = folder / src.name
+    if exe != dst:
+        exe.rename(dst)
+    return dst
+
+
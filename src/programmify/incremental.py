@@ -0,0 +1,129 @@
+"""Fingerprinting of build inputs so unchanged programs are not rebuilt.
+
+Every incremental build gets a persistent work directory in the user cache (see `project_dir`) where PyInstaller keeps
+its analysis cache, spec file and generated config between builds, along with a manifest of the last build.
+"""
+import ast
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+from programmify.builder import cache_dir
+
+manifest_name = "programmify-build.json"
+
+
+def project_dir(file, name: str, mode: str = None) -> Path:
+    """Persistent work directory for building `file` as `name` in `mode`."""
+    key = hashlib.sha256(f"{Path(file).resolve()}|{name}|{mode}".encode()).hexdigest()[:16]
+    return cache_dir() / "builds" / f"{Path(file).stem}-{key}"
+
+
+def _module_files(folder: Path, module: str):
+    """Files in `folder` that `import module` may load: the module itself and the __init__.py of every package on the
+    way to it."""
+    files = []
+    path = folder
+    for part in module.split("."):
+        path = path / part
+        if (path / "__init__.py").exists():
+            files.append(path / "__init__.py")
+        elif path.with_suffix(".py").exists():
+            files.append(path.with_suffix(".py"))
+            break
+        else:
+            break
+    return files
+
+
+def local_imports(file) -> list:
+    """`file` and every local module it imports, directly or indirectly, resolved relative to the folder of `file`."""
+    file = Path(file).resolve()
+    root = file.parent
+    seen = set()
+    todo = [file]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        try:
+            tree = ast.parse(path.read_bytes(), str(path))
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    todo.extend(_module_files(root, alias.name))
+            elif isinstance(node, ast.ImportFrom):
+                base = root
+                if node.level:
+                    base = path.parent
+                    for _ in range(node.level - 1):
+                        base = base.parent
+                module = node.module or ""
+                if module:
+                    todo.extend(_module_files(base, module))
+                # `from package import module` may import submodules as well as names
+                for alias in node.names:
+                    todo.extend(_module_files(base, f"{module}.{alias.name}" if module else alias.name))
+    return sorted(seen)
+
+
+def _tool_versions() -> dict:
+    from importlib import metadata
+    versions = {"python": sys.version}
+    for dist in ("pyinstaller", "programmify"):
+        try:
+            versions[dist] = metadata.version(dist)
+        except metadata.PackageNotFoundError:
+            versions[dist] = None
+    return versions
+
+
+def _data_sources(cmd: list) -> list:
+    """Source files of every --add-data and --icon argument, and the modules in every --paths folder (like the
+    generated config) of a pyinstaller command."""
+    sources = []
+    for i, arg in enumerate(cmd):
+        if arg == "--add-data" and i + 1 < len(cmd):
+            sources.append(cmd[i + 1].rsplit(";", 1)[0])
+        elif arg == "--paths" and i + 1 < len(cmd):
+            sources.extend(sorted(str(p) for p in Path(cmd[i + 1]).glob("*.py")))
+        elif arg.startswith("--icon="):
+            sources.append(arg[len("--icon="):])
+    return sources
+
+
+def fingerprint(cmd: list, file) -> str:
+    """Hash of everything that affects the built program: the command (options, hidden imports), the content of the
+    entry file and its local imports, the content of the icon, config and extra files, programmify itself and the tool
+    versions."""
+    h = hashlib.sha256()
+    h.update(json.dumps({"cmd": [str(v) for v in cmd], "versions": _tool_versions()}).encode())
+    programmify_files = sorted(Path(__file__).parent.glob("*.py"))
+    for path in local_imports(file) + [Path(p) for p in _data_sources(cmd)] + programmify_files:
+        h.update(str(path).encode())
+        try:
+            h.update(hashlib.sha256(Path(path).read_bytes()).digest())
+        except OSError:
+            h.update(b"<missing>")
+    return h.hexdigest()
+
+
+def is_up_to_date(workdir: Path, digest: str, dst: Path) -> bool:
+    """Whether the last build in `workdir` had the same fingerprint and produced `dst`, which has not changed since."""
+    try:
+        manifest = json.loads((Path(workdir) / manifest_name).read_text())
+        stat = Path(dst).stat()
+    except (OSError, ValueError):
+        return False
+    return (manifest.get("fingerprint") == digest and manifest.get("artifact") == str(dst)
+            and manifest.get("size") == stat.st_size and manifest.get("mtime_ns") == stat.st_mtime_ns)
+
+
+def record_build(workdir: Path, digest: str, dst: Path):
+    stat = Path(dst).stat()
+    manifest = {"fingerprint": digest, "artifact": str(dst), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    (Path(workdir) / manifest_name).write_text(json.dumps(manifest, indent=2))
@@ -0,0 +1,148 @@
+import contextlib
+import json
+import os
+import sys
+import time
+
+from PyQt5 import QtCore
+
+# fallback for when the start time of the process cannot be read from the OS
+_import_time = time.time()
+
+
+def process_start_time() -> float:
+    """Wall clock time (time.time()) at which the current process was started."""
+    try:
+        if sys.platform.startswith("linux"):
+            with open("/proc/self/stat") as f:
+                # the process name may contain spaces, the fields we want come after its closing parenthesis
+                fields = f.read().rsplit(")", 1)[1].split()
+            start_ticks = int(fields[19])
+            with open("/proc/uptime") as f:
+                uptime = float(f.read().split()[0])
+            return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            creation, exit_, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            kernel32 = ctypes.windll.kernel32
+            if kernel32.GetProcessTimes(kernel32.GetCurrentProcess(), ctypes.byref(creation), ctypes.byref(exit_),
+                                        ctypes.byref(kernel), ctypes.byref(user)):
+                # FILETIME counts 100ns intervals since 1601-01-01
+                ticks = (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+                return ticks / 1e7 - 11644473600
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    return _import_time
+
+
+class Instrumentation(QtCore.QObject):
+    """Startup timings and event loop stalls of a running Programmify app.
+
+    Enable it with `MyWidget.run(instrument=True)`, by setting `instrument = True` on the class, or with the
+    PROGRAMMIFY_INSTRUMENT environment variable (1, or the path of a .jsonl file to append every event to). The running
+    instance is available as `window.instrumentation` and `Instrumentation.current`.
+
+    Records, in seconds since the process started: `qapplication` (QApplication created), `first_show` and
+    `first_paint` of the window (`tray_ready` instead when it starts in the tray, see `Programmify.tray_only`), and
+    the duration of `set_icon` and `setupUI` of every Programmify widget. While the event loop runs a watchdog timer
+    records every stall longer than `stall_threshold` ms.
+    """
+    current = None
+
+    def __init__(self, path: str = None, stall_threshold: float = 100, watchdog_interval: int = 20, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.stall_threshold = stall_threshold
+        self.watchdog_interval = watchdog_interval
+        self.start_time = process_start_time()
+        self.marks = {}
+        self.spans = []
+        self.stalls = []
+        self.stall_callbacks = []
+        self._watchdog = None
+        self._last_tick = None
+        self._file = open(path, "a") if path else None
+
+    @classmethod
+    def from_env(cls, enabled=None):
+        """Instrumentation configured from the PROGRAMMIFY_INSTRUMENT and PROGRAMMIFY_STALL_MS environment variables, or
+        None if it is not enabled there or by `enabled`."""
+        value = os.environ.get("PROGRAMMIFY_INSTRUMENT", "")
+        if not (enabled or value not in ("", "0")):
+            return None
+        path = value if value not in ("", "0", "1") else None
+        return cls(path, stall_threshold=float(os.environ.get("PROGRAMMIFY_STALL_MS", 100)))
+
+    def now(self) -> float:
+        """Seconds since the process started."""
+        return time.time() - self.start_time
+
+    def record(self, event: dict):
+        if self._file:
+            self._file.write(json.dumps(event) + "\n")
+            self._file.flush()
+
+    def mark(self, name: str):
+        """Record the first time `name` happened."""
+        if name not in self.marks:
+            self.marks[name] = self.now()
+            self.record({"event": "mark", "name": name, "t": self.marks[name]})
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - start) * 1000
+            self.spans.append({"name": name, "ms": ms})
+            self.record({"event": "span", "name": name, "ms": ms, "t": self.now()})
+
+    def watch(self, window):
+        """Record when `window` is first shown and painted and start the stall watchdog."""
+        window.installEventFilter(self)
+        self._watchdog = QtCore.QTimer(self)
+        self._watchdog.setTimerType(QtCore.Qt.PreciseTimer)
+        self._watchdog.setInterval(self.watchdog_interval)
+        self._watchdog.timeout.connect(self._tick)
+        self._last_tick = time.perf_counter()
+        self._watchdog.start()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Show:
+            self.mark("first_show")
+        elif event.type() == QtCore.QEvent.Paint:
+            self.mark("first_paint")
+        return False
+
+    def _tick(self):
+        now = time.perf_counter()
+        # how much later than expected the timer fired, i.e. how long the event loop was busy
+        late = (now - self._last_tick) * 1000 - self.watchdog_interval
+        self._last_tick = now
+        if late >= self.stall_threshold:
+            stall = {"t": self.now(), "ms": late}
+            self.stalls.append(stall)
+            self.record({"event": "stall", **stall})
+            for callback in self.stall_callbacks:
+                callback(stall)
+
+    def to_dict(self) -> dict:
+        return {"start_time": self.start_time, "marks": self.marks, "spans": self.spans, "stalls": self.stalls,
+                "stall_threshold_ms": self.stall_threshold}
+
+    def close(self):
+        if self._watchdog is not None:
+            self._watchdog.stop()
+        self.record({"event": "summary", **self.to_dict()})
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def span(name: str):
+    """`Instrumentation.current.span(name)`, or nothing when instrumentation is off."""
+    if Instrumentation.current is None:
+        return contextlib.nullcontext()
+    return Instrumentation.current.span(name)
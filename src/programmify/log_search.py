@@ -0,0 +1,163 @@
+import re
+
+from PyQt5 import QtWidgets, QtGui, QtCore
+
+from programmify import ansi
+from programmify.log_sink import LogSink, search_logs, read_context, strip_prefix
+from programmify.log_view import LogView
+
+
+class LogSearchThread(QtCore.QThread):
+    """Search the files of a LogSink in the background, emitting the matches in batches."""
+    found_signal = QtCore.pyqtSignal(list)
+    done_signal = QtCore.pyqtSignal(int)
+
+    def __init__(self, sink: LogSink, pattern: str, flags: int = 0, max_results: int = 1000, parent=None):
+        super().__init__(parent)
+        self.sink = sink
+        self.pattern = pattern
+        self.flags = flags
+        self.max_results = max_results
+        self.cancelled = False
+
+    def run(self):
+        # lines still queued in the sink would not be found
+        self.sink.flush(timeout=5)
+        batch = []
+        found = 0
+        last_emit = 0
+        for match in search_logs(self.sink.files, self.pattern, self.flags, self.max_results,
+                                 cancelled=lambda: self.cancelled):
+            batch.append(match)
+            found += 1
+            # emit in growing batches so the first matches show up immediately without flooding the event loop
+            if len(batch) > last_emit:
+                self.found_signal.emit(batch)
+                last_emit = len(batch)
+                batch = []
+        if batch:
+            self.found_signal.emit(batch)
+        self.done_signal.emit(found)
+
+
+class LogSearchBar(QtWidgets.QWidget):
+    """Regex search over the persisted logs of a process, with a list of matching lines.
+
+    Activating a match selects the line in `view` if it is still in its scrollback, otherwise the lines around it are
+    read from the log file and shown below the list.
+    """
+
+    def __init__(self, sink: LogSink, view: LogView, parent=None, max_results: int = 1000):
+        super().__init__(parent)
+        self.sink = sink
+        self.view = view
+        self.max_results = max_results
+        self.search_thread = None
+        self.matches = []
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        row = QtWidgets.QHBoxLayout()
+        self.input = QtWidgets.QLineEdit(self)
+        self.input.setPlaceholderText("Search logs (regex), Enter to search, Esc to close")
+        self.input.returnPressed.connect(self.search)
+        row.addWidget(self.input)
+        self.case_sensitive = QtWidgets.QCheckBox("Aa", self)
+        self.case_sensitive.setToolTip("Case sensitive")
+        row.addWidget(self.case_sensitive)
+        self.status = QtWidgets.QLabel(self)
+        row.addWidget(self.status)
+        layout.addLayout(row)
+
+        self.results = QtWidgets.QListWidget(self)
+        self.results.setUniformItemSizes(True)
+        self.results.currentRowChanged.connect(self.show_match)
+        self.results.hide()
+        layout.addWidget(self.results)
+
+        # filled while hidden, right before it is shown
+        self.context = LogView(self, max_lines=None, suspend_when_hidden=False)
+        self.context.setStyleSheet("background-color: #2b2b2b; color: white;")
+        self.context.hide()
+        layout.addWidget(self.context)
+
+        QtWidgets.QShortcut(QtGui.QKeySequence(QtCore.Qt.Key_Escape), self.input, self.close_results)
+
+    def focus(self):
+        self.input.setFocus()
+        self.input.selectAll()
+
+    def search(self):
+        pattern = self.input.text()
+        self.cancel()
+        self.matches = []
+        self.results.clear()
+        self.context.hide()
+        if not pattern:
+            self.close_results()
+            return
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            self.status.setText(f"invalid regex: {e}")
+            return
+        flags = 0 if self.case_sensitive.isChecked() else re.IGNORECASE
+        self.status.setText("searching...")
+        self.results.show()
+        self.search_thread = LogSearchThread(self.sink, pattern, flags, self.max_results, self)
+        self.search_thread.found_signal.connect(self.add_matches)
+        self.search_thread.done_signal.connect(self.search_done)
+        self.search_thread.start()
+
+    def cancel(self):
+        if self.search_thread is not None:
+            self.search_thread.cancelled = True
+            self.search_thread.found_signal.disconnect(self.add_matches)
+            self.search_thread.done_signal.disconnect(self.search_done)
+            self.search_thread = None
+
+    def stop(self):
+        """Cancel the search and wait for the search threads to end, before the bar is deleted."""
+        self.cancel()
+        for thread in self.findChildren(LogSearchThread):
+            thread.cancelled = True
+            thread.wait()
+
+    def add_matches(self, matches):
+        self.matches.extend(matches)
+        self.results.addItems([ansi.escape_pattern.sub("", match.line) for match in matches])
+
+    def search_done(self, found):
+        more = "+" if found >= self.max_results else ""
+        self.status.setText(f"{found}{more} matches")
+
+    def show_match(self, row):
+        if not 0 <= row < len(self.matches):
+            return
+        match = self.matches[row]
+        # the display shows the text without its escape sequences
+        text = ansi.escape_pattern.sub("", strip_prefix(match.line))
+        # the most recent occurrence is the one most likely to be the logged line
+        cursor = self.view.textCursor()
+        cursor.movePosition(QtGui.QTextCursor.End)
+        self.view.setTextCursor(cursor)
+        if text and self.view.find(text, QtGui.QTextDocument.FindBackward | QtGui.QTextDocument.FindCaseSensitively):
+            self.context.hide()
+            return
+        # no longer in the scrollback, show it from the file
+        lines, index = read_context(match.file, match.offset)
+        self.context.clear()
+        self.context.append_lines(lines)
+        block = self.context.document().findBlockByNumber(index)
+        cursor = QtGui.QTextCursor(block)
+        cursor.movePosition(QtGui.QTextCursor.EndOfBlock, QtGui.QTextCursor.KeepAnchor)
+        self.context.setTextCursor(cursor)
+        self.context.centerCursor()
+        self.context.show()
+
+    def close_results(self):
+        self.cancel()
+        self.results.hide()
+        self.context.hide()
+        self.status.clear()
+        self.view.setFocus()
@@ -0,0 +1,259 @@
+"""Persist the output of a process to rotating log files, and search them.
+
+`LogSink.write` only appends the line to a deque, which is safe to call from the pipe reader thread and never waits:
+formatting, encoding, writing and rotating the files happens on the sink's own writer thread.
+
+`search_logs` memory-maps the files and runs a bytes regex over them, so logs of any size can be searched without
+reading them into memory or into the display.
+"""
+import mmap
+import os
+import re
+import threading
+import time
+from collections import deque, namedtuple
+from pathlib import Path
+
+# one matching line, offset is the position of the start of the line in file
+LogMatch = namedtuple("LogMatch", ["file", "offset", "line"])
+
+
+class LogSink:
+    """Write timestamped output lines to `path`, rotated to path.1 ... path.{backups} when it reaches `max_bytes`.
+
+    Every line is written as `2024-01-31 12:00:00.123 stdout text`.
+
+    Errors writing or rotating the files (a full disk, a file locked by another program) do not stop the sink: the lines
+    that could not be written are counted in `dropped`, the file is reopened on the next write and a failed rotation is
+    retried every `retry_interval` seconds. At most `max_pending` lines wait to be written, later ones are dropped.
+    """
+
+    def __init__(self, path, max_bytes: int = 64 * 2 ** 20, backups: int = 5, flush_interval: float = 0.2,
+                 encoding: str = "utf-8", max_pending: int = 1000000, retry_interval: float = 1.0):
+        self.path = Path(path).expanduser().resolve()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.encoding = encoding
+        self.max_pending = max_pending
+        self.retry_interval = retry_interval
+        # lines that were not written, because of an error or because too many were pending
+        self.dropped = 0
+        self.error = None
+        # OutputLine timestamps are time.monotonic(), this turns them into wall clock time
+        self._clock_offset = time.time() - time.monotonic()
+        self._pending = deque()
+        self._wake = threading.Event()
+        self._closed = False
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+        self._next_rotate = 0.0
+        self._second = None
+        self._prefix = ""
+        self._thread = threading.Thread(target=self._run, name=f"LogSink {self.path.name}", daemon=True)
+        self._thread.start()
+
+    @property
+    def files(self) -> list:
+        """The log files that exist, oldest first."""
+        files = [self.path.with_name(f"{self.path.name}.{i}") for i in range(self.backups, 0, -1)] + [self.path]
+        return [f for f in files if f.exists()]
+
+    def write(self, line):
+        """Queue an OutputLine to be written. Never blocks."""
+        if self._closed:
+            return
+        if len(self._pending) >= self.max_pending or not self._thread.is_alive():
+            self.dropped += 1
+            return
+        self._pending.append(line)
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until every line written so far is on disk."""
+        if self._closed or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._pending.append(done)
+        self._wake.set()
+        return done.wait(timeout)
+
+    def close(self):
+        """Write everything that is queued, then stop the writer thread and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while True:
+                closing = self._closed
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self._drain()
+                if closing or self._closed:
+                    # the last lines may have been queued while draining
+                    self._drain()
+                    break
+        finally:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+            # release whoever waits in flush
+            while self._pending:
+                item = self._pending.popleft()
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _drain(self):
+        chunk = []
+        while self._pending:
+            item = self._pending.popleft()
+            if isinstance(item, threading.Event):
+                self._write(chunk)
+                chunk = []
+                item.set()
+            else:
+                chunk.append(self._format(item))
+        self._write(chunk)
+
+    def _format(self, line) -> str:
+        wall = line.timestamp + self._clock_offset
+        second = int(wall)
+        if second != self._second:
+            # formatting the date is the expensive part, do it once per second
+            self._second = second
+            self._prefix = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(second))
+        return f"{self._prefix}.{int((wall - second) * 1000):03d} {line.stream} {line.text}\n"
+
+    def _write(self, lines):
+        # the size is checked for every line so that a file never grows past max_bytes by more than one line
+        data = []
+        size = self._size
+        for line in lines:
+            encoded = line.encode(self.encoding, "replace")
+            if size and size + len(encoded) > self.max_bytes and time.monotonic() >= self._next_rotate:
+                self._write_data(b"".join(data))
+                data = []
+                self._rotate()
+                size = self._size
+            data.append(encoded)
+            size += len(encoded)
+        self._write_data(b"".join(data))
+
+    def _write_data(self, data: bytes):
+        if not data:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+                self._size = self._file.tell()
+            self._file.write(data)
+            # every drain is written at once, flushing right away tells which lines did not make it
+            self._file.flush()
+        except (OSError, ValueError) as e:
+            self.dropped += data.count(b"\n")
+            self._failed(e)
+            return
+        self._size += len(data)
+        self.error = None
+
+    def _failed(self, error):
+        if self.error is None:
+            print(f"Failed to write to {self.path}: {error}, output is not logged until it works again")
+        self.error = error
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _rotate(self):
+        try:
+            self._file.close()
+        except (OSError, AttributeError):
+            pass
+        self._file = None
+        try:
+            if self.backups:
+                for i in range(self.backups - 1, 0, -1):
+                    src = self.path.with_name(f"{self.path.name}.{i}")
+                    if src.exists():
+                        os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+                os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+            mode = "wb"
+        except OSError as e:
+            # e.g. on Windows while the file is mapped by a search, keep appending to it and try again later
+            print(f"Failed to rotate {self.path}: {e}")
+            self._next_rotate = time.monotonic() + self.retry_interval
+            mode = "ab"
+        try:
+            self._file = open(self.path, mode)
+            self._size = self._file.tell()
+        except OSError as e:
+            self._failed(e)
+
+
+def search_logs(files, pattern, flags: int = 0, max_results: int = None, cancelled=None):
+    """Yield a LogMatch for every line of `files` matching the regex `pattern` (str or bytes), in file order.
+
+    `cancelled` is an optional callable checked between matches to stop early.
+    """
+    if isinstance(pattern, str):
+        pattern = pattern.encode("utf-8")
+    regex = re.compile(pattern, flags | re.MULTILINE)
+    found = 0
+    for file in files:
+        try:
+            with open(file, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    pos = 0
+                    while True:
+                        match = regex.search(mm, pos)
+                        if match is None or (cancelled is not None and cancelled()):
+                            break
+                        start = mm.rfind(b"\n", 0, match.start()) + 1
+                        end = mm.find(b"\n", match.end())
+                        end = len(mm) if end < 0 else end
+                        yield LogMatch(str(file), start, mm[start:end].decode("utf-8", "replace"))
+                        found += 1
+                        if max_results is not None and found >= max_results:
+                            return
+                        # one match per line
+                        pos = end + 1
+        except (OSError, ValueError):
+            # rotated away while searching
+            continue
+
+
+def read_context(file, offset: int, before: int = 50, after: int = 50):
+    """The lines around the line starting at `offset` in `file`, and the index of that line in them."""
+    with open(file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start = offset
+        for _ in range(before):
+            if start <= 0:
+                break
+            start = mm.rfind(b"\n", 0, start - 1) + 1
+        end = offset
+        for _ in range(after + 1):
+            next_end = mm.find(b"\n", end)
+            if next_end < 0:
+                end = len(mm)
+                break
+            end = next_end + 1
+        lines = mm[start:end].decode("utf-8", "replace").splitlines()
+        index = mm[start:offset].count(b"\n")
+    return lines, index
+
+
+def strip_prefix(line: str) -> str:
+    """The output of a logged line, without its date, time and stream."""
+    parts = line.split(" ", 3)
+    return parts[3] if len(parts) == 4 else line
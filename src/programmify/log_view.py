@@ -0,0 +1,193 @@
+from collections import deque
+
+from PyQt5 import QtWidgets, QtGui, QtCore
+
+from programmify import ansi
+
+
+class LogView(QtWidgets.QPlainTextEdit):
+    """Read-only output display with a bounded scrollback.
+
+    QPlainTextEdit only lays out and paints the visible lines, and with a maximum block count the oldest lines are
+    dropped as new ones arrive, so memory and the cost of an append stay flat however long the process runs.
+
+    ANSI color codes are shown as colors: the text is split into runs by style (see programmify.ansi) and every run
+    is inserted with its QTextCharFormat, text is never parsed as HTML.
+
+    While the view is hidden (its window minimized or hidden to the tray, or in a tab that is not shown) appended lines
+    are only kept in a buffer of the last `max_lines`, and inserted in one edit when it is shown again, preceded by a
+    line with the number of lines that did not fit. The lines a view never showed are counted in `hidden_dropped`.
+    """
+
+    def __init__(self, parent=None, max_lines: int = 10000, max_bytes: int = None, suspend_when_hidden: bool = True,
+                 hidden_buffer: int = 100000):
+        """
+        max_lines: number of lines to keep, None for unlimited
+        max_bytes: approximate number of bytes (utf-8) of text to keep, None for unlimited
+        suspend_when_hidden: only buffer the lines appended while the view is hidden
+        hidden_buffer: number of lines buffered while hidden if max_lines is None
+        """
+        super().__init__(parent)
+        self.setReadOnly(True)
+        # the undo stack would otherwise keep a copy of everything ever appended
+        self.setUndoRedoEnabled(False)
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self._empty = True
+        # byte size of every line in the document, oldest first, used to enforce max_bytes
+        self._sizes = deque(maxlen=max_lines)
+        self._total_bytes = 0
+        # the ANSI style in effect at the end of the log, and a QTextCharFormat per style seen
+        self._style = ansi.plain
+        self._formats = {ansi.plain: QtGui.QTextCharFormat()}
+        self.suspend_when_hidden = suspend_when_hidden
+        # lines appended while hidden, only as many as the display would keep
+        self._held = deque(maxlen=max_lines or hidden_buffer)
+        self._held_dropped = 0
+        self.hidden_dropped = 0
+        self._watched_window = None
+        if max_lines:
+            self.setMaximumBlockCount(max_lines)
+
+    def append(self, text: str):
+        self.append_lines(text.split("\n"))
+
+    def append_lines(self, lines):
+        """Append lines (without trailing newlines) to the end of the log in a single edit."""
+        if not lines:
+            return
+        if self.suspend_when_hidden and self.is_hidden():
+            self._hold(lines)
+            return
+        self._insert_lines(lines)
+
+    def is_hidden(self) -> bool:
+        """Whether nobody can see the view: it or its window is hidden, or the window is minimized."""
+        return not self.isVisible() or self.window().isMinimized()
+
+    def _hold(self, lines):
+        window = self.window()
+        if window is not self._watched_window:
+            # restoring a minimized window does not show its children again, watch the window for that
+            if self._watched_window is not None:
+                self._watched_window.removeEventFilter(self)
+            window.installEventFilter(self)
+            self._watched_window = window
+        overflow = len(self._held) + len(lines) - self._held.maxlen
+        if overflow > 0:
+            self._held_dropped += overflow
+        self._held.extend(lines)
+
+    def catch_up(self):
+        """Insert the lines buffered while hidden."""
+        if not self._held:
+            return
+        lines = list(self._held)
+        self._held.clear()
+        dropped, self._held_dropped = self._held_dropped, 0
+        if not dropped:
+            self._insert_lines(lines)
+            return
+        # a color still open where the display stopped applies to the lines after the marker, not to the marker
+        style = self._style
+        if self.max_lines and len(lines) >= self.max_lines:
+            # make room for the line with the count, everything in the display would be pushed out anyway
+            extra = len(lines) - self.max_lines + 1
+            skipped, lines = "\n".join(lines[:extra]), lines[extra:]
+            if "\x1b" in skipped:
+                style = ansi.split_runs(skipped, style)[1]
+            dropped += extra
+            self.clear()
+        self.hidden_dropped += dropped
+        self._style = ansi.plain
+        self._insert_lines([f"\x1b[0;90m... {dropped:,} lines not shown while hidden ...\x1b[0m"])
+        self._style = style
+        self._insert_lines(lines)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.catch_up()
+
+    def eventFilter(self, obj, event):
+        if obj is self._watched_window and event.type() in (QtCore.QEvent.WindowStateChange, QtCore.QEvent.Show):
+            if self._held and not self.is_hidden():
+                # after the state change has been applied
+                QtCore.QTimer.singleShot(0, self.catch_up)
+        return False
+
+    def _insert_lines(self, lines):
+        if self.max_bytes:
+            self._track_sizes(lines)
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        cursor = QtGui.QTextCursor(self.document())
+        cursor.movePosition(QtGui.QTextCursor.End)
+        cursor.beginEditBlock()
+        if not self._empty:
+            cursor.insertBlock()
+        text = "\n".join(lines)
+        if "\x1b" in text or self._style != ansi.plain:
+            runs, self._style = ansi.split_runs(text, self._style)
+            for run, style in runs:
+                cursor.insertText(run, self.char_format(style))
+        else:
+            cursor.insertText(text, self._formats[ansi.plain])
+        cursor.endEditBlock()
+        self._empty = False
+        if self.max_bytes:
+            self._trim_bytes()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def char_format(self, style: ansi.Style) -> QtGui.QTextCharFormat:
+        """The format text in `style` is displayed with, created once per style."""
+        fmt = self._formats.get(style)
+        if fmt is None:
+            if len(self._formats) > 4096:
+                # 24 bit color gradients would otherwise grow the cache without bound
+                self._formats = {ansi.plain: self._formats[ansi.plain]}
+            fmt = QtGui.QTextCharFormat()
+            fg, bg = (style.bg, style.fg) if style.inverse else (style.fg, style.bg)
+            if style.inverse:
+                # swapping with the default colors of the display
+                fg = fg or self.palette().color(QtGui.QPalette.Base).getRgb()[:3]
+                bg = bg or self.palette().color(QtGui.QPalette.Text).getRgb()[:3]
+            if fg:
+                fmt.setForeground(QtGui.QColor(*fg))
+            if bg:
+                fmt.setBackground(QtGui.QColor(*bg))
+            if style.bold:
+                fmt.setFontWeight(QtGui.QFont.Bold)
+            fmt.setFontItalic(style.italic)
+            fmt.setFontUnderline(style.underline)
+            fmt.setFontStrikeOut(style.strike)
+            self._formats[style] = fmt
+        return fmt
+
+    def _track_sizes(self, lines):
+        for line in lines:
+            if self.max_lines and len(self._sizes) == self.max_lines:
+                # this line will push the oldest one out of the document
+                self._total_bytes -= self._sizes[0]
+            size = len(line.encode("utf-8", "replace")) + 1
+            self._sizes.append(size)
+            self._total_bytes += size
+
+    def _trim_bytes(self):
+        n = 0
+        while self._total_bytes > self.max_bytes and len(self._sizes) > 1:
+            self._total_bytes -= self._sizes.popleft()
+            n += 1
+        if n:
+            cursor = QtGui.QTextCursor(self.document())
+            cursor.movePosition(QtGui.QTextCursor.Start)
+            cursor.movePosition(QtGui.QTextCursor.NextBlock, QtGui.QTextCursor.KeepAnchor, n)
+            cursor.removeSelectedText()
+
+    def clear(self):
+        super().clear()
+        self._empty = True
+        self._held.clear()
+        self._sizes.clear()
+        self._total_bytes = 0
+        self._style = ansi.plain
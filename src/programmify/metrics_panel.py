@@ -0,0 +1,42 @@
+from PyQt5 import QtWidgets, QtCore
+
+from programmify.output_rules import RuleSet
+
+
+class MetricsPanel(QtWidgets.QLabel):
+    """One line with the live values of the count and extract rules of a RuleSet, refreshed every `interval` ms.
+
+    Counts are shown with their rate over the last interval, extracted numbers with their last value and mean. The
+    tooltip has the hits and the time spent per line of every rule, to find the expensive ones.
+    """
+
+    def __init__(self, rules: RuleSet, parent=None, interval: int = 1000):
+        super().__init__(parent)
+        self.rules = rules
+        self._last_hits = {}
+        self._last_time = None
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(interval)
+        self.refresh()
+
+    def refresh(self):
+        stats = self.rules.stats()
+        elapsed = stats["seconds"] - self._last_time if self._last_time is not None else None
+        self._last_time = stats["seconds"]
+        parts = []
+        tips = [f"{stats['lines']} lines, {stats['dropped']} hidden"]
+        for i, rule in enumerate(stats["rules"]):
+            hits = rule["hits"]
+            rate = (hits - self._last_hits.get(i, 0)) / elapsed if elapsed else 0.0
+            self._last_hits[i] = hits
+            if rule["action"] == "count":
+                parts.append(f"{rule['name']}: {hits} ({rate:.1f}/s)")
+            elif rule["action"] == "extract" and rule["value"] is not None:
+                parts.append(f"{rule['name']}: {rule['value']:g} (mean {rule['mean']:.4g})")
+            per_line = rule["seconds"] / stats["lines"] * 1e6 if stats["lines"] else 0.0
+            tips.append(f"{rule['name']}: {hits} hits, {per_line:.2f}µs/line")
+        if stats["dropped"]:
+            parts.append(f"hidden: {stats['dropped']}")
+        self.setText("  |  ".join(parts))
+        self.setToolTip("\n".join(tips))
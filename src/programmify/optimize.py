@@ -0,0 +1,212 @@
+"""Smaller builds: exclude what the program does not use and report what is left.
+
+`_build(optimize=True)` finds the PyQt5 modules and the packages imported by the entry file, its local imports and
+programmify itself, excludes every other PyQt5 module and the build-only packages (`excludes`), and builds from a spec
+file patched to drop Qt's translations and the image format plugins a tray program does not need (`write_spec`).
+`size_breakdown` then attributes every byte of the artifact to the package it came from.
+"""
+import ast
+import os
+import subprocess
+from collections import Counter
+from importlib.util import find_spec
+from pathlib import Path
+
+# packages that end up in a build because something imports them lazily, but that a built program does not need unless
+# it or the part of programmify it runs imports them (see excludes)
+build_only_packages = ["PyInstaller", "PIL", "tkinter", "_tkinter", "lib2to3", "setuptools", "pip", "distutils",
+                       "pydoc_data"]
+
+# .ico for the window and tray icon, the common formats for images a program shows itself
+kept_image_formats = ["qico", "qgif", "qjpeg", "qsvg"]
+
+# pyinstaller options that apply to building from a spec file rather than generating it, with whether they take a value
+build_options = {"--distpath": True, "--workpath": True, "--noconfirm": False, "-y": False, "--clean": False}
+
+# pasted into the spec file after the analysis, matches the destination of every bundled file
+strip_code = '''
+# added by programmify --optimize: drop Qt translations and unused image format plugins
+import re as _re
+_strip = _re.compile(r"(^|/)PyQt5/Qt5?/(translations/|plugins/imageformats/(?!(lib)?({formats})\\.))")
+a.datas = [entry for entry in a.datas if not _strip.search(entry[0].replace("\\\\", "/"))]
+a.binaries = [entry for entry in a.binaries if not _strip.search(entry[0].replace("\\\\", "/"))]
+'''
+
+
+def imported_modules(files, package: str = None) -> set:
+    """Every module named in an import statement of `files`, with its parent packages. Relative imports are resolved
+    if the files are the modules of `package`, and skipped otherwise."""
+    modules = set()
+    for path in files:
+        try:
+            tree = ast.parse(Path(path).read_bytes(), str(path))
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and (node.module or node.level):
+                module = node.module
+                if node.level:
+                    if package is None or node.level > 1:
+                        continue
+                    module = f"{package}.{module}" if module else package
+                # `from PyQt5 import QtWidgets` imports the submodule PyQt5.QtWidgets
+                names = [module] + [f"{module}.{alias.name}" for alias in node.names]
+            else:
+                continue
+            for name in names:
+                parts = name.split(".")
+                modules.update(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+    return modules
+
+
+def qt_modules() -> list:
+    """Names of the installed PyQt5 extension modules (QtCore, QtWebEngineWidgets, ...), without importing them."""
+    spec = find_spec("PyQt5")
+    if spec is None or not spec.submodule_search_locations:
+        return []
+    names = set()
+    for folder in spec.submodule_search_locations:
+        for entry in os.scandir(folder):
+            stem = entry.name.split(".")[0]
+            if entry.is_file() and stem.startswith("Qt") and entry.name.endswith((".so", ".pyd")):
+                names.add(stem)
+    return sorted(names)
+
+
+def runtime_modules(used: set) -> set:
+    """Every module imported by the programmify modules a built program may load: programmify.programmify, the ones in
+    `used` and, recursively, what they import. Imports inside functions count, e.g. PIL to convert a .png icon."""
+    folder = Path(__file__).parent
+    todo = ["programmify.programmify"] + sorted(name for name in used if name.startswith("programmify."))
+    seen = set()
+    modules = set()
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        parts = name.split(".")
+        path = folder.joinpath(*parts[1:-1], f"{parts[-1]}.py") if len(parts) > 1 else folder / "__init__.py"
+        if not path.exists():
+            # an attribute imported from a module, e.g. programmify.SubprocessWidget
+            continue
+        found = imported_modules([path], package="programmify")
+        modules |= found
+        todo.extend(module for module in found if module.startswith("programmify."))
+    return modules
+
+
+def excludes(file, keep: list = None) -> list:
+    """Modules to pass to pyinstaller as --exclude-module when building `file`, never any of `keep` (hidden imports)."""
+    from programmify.incremental import local_imports
+    used = imported_modules(local_imports(file)) | set(keep or [])
+    # programmify's own Qt modules are needed whatever the program imports, its build tools are not
+    qt_used = used | imported_modules(Path(__file__).parent.glob("*.py"))
+    result = [f"PyQt5.{name}" for name in qt_modules() if f"PyQt5.{name}" not in qt_used]
+    runtime = runtime_modules(used)
+    result.extend(name for name in build_only_packages if name not in used and name not in runtime)
+    return result
+
+
+def write_spec(cmd: list, specpath, file) -> list:
+    """Generate the spec file for pyinstaller command `cmd` building the entry script `file` with pyi-makespec, patch
+    it to strip unused Qt files and return the command that builds from it."""
+    makespec = ["pyi-makespec"]
+    build = [cmd[0], "--noconfirm"]
+    args = iter(cmd[1:])
+    for arg in args:
+        if arg in build_options:
+            target = build if arg not in ("--noconfirm", "-y") else []
+            target.append(arg)
+            if build_options[arg]:
+                target.append(next(args))
+        else:
+            makespec.append(arg)
+    if "--specpath" not in makespec:
+        makespec.extend(["--specpath", str(specpath)])
+    subprocess.run(makespec, check=True, stdout=subprocess.DEVNULL)
+
+    # named after the entry script, arguments given with --args may come after it in `cmd`
+    name = Path(file).stem
+    for i, arg in enumerate(makespec[:-1]):
+        if arg in ("--name", "-n"):
+            name = makespec[i + 1]
+    spec = Path(makespec[makespec.index("--specpath") + 1]) / f"{name}.spec"
+    text = spec.read_text()
+    code = strip_code.replace("{formats}", "|".join(kept_image_formats))
+    # the analysis is the first statement of a generated spec, everything after it builds from `a`
+    text = text.replace("\npyz = PYZ(", f"{code}\npyz = PYZ(", 1)
+    spec.write_text(text)
+    return build + [str(spec)]
+
+
+def _package(name: str) -> str:
+    """Package a bundled file or module belongs to, e.g. PyQt5/Qt5/lib/libQt5Core.so.5 -> PyQt5."""
+    name = name.replace("\\", "/")
+    if "/" in name:
+        return name.split("/")[0]
+    if name == "base_library.zip":
+        return "(stdlib)"
+    if name.endswith((".so", ".pyd", ".dll", ".dylib")) or ".so." in name:
+        # shared libraries at the top level: libpython3.11.so, python311.dll, _ssl.pyd, ...
+        return "(libraries)"
+    return name.split(".")[0]
+
+
+def _executable_sizes(exe: Path, sizes: Counter):
+    """Add the contents of the archive pyinstaller appends to `exe` to `sizes`, by compressed size."""
+    from PyInstaller.archive.readers import ArchiveReadError, CArchiveReader
+    try:
+        archive = CArchiveReader(str(exe))
+    except (ArchiveReadError, OSError):
+        sizes["(program)"] += exe.stat().st_size
+        return
+    for name, (_, length, _, _, typecode) in archive.toc.items():
+        if typecode == "z":
+            # the PYZ holds the compiled modules, split it up by package too
+            for module, (_, _, module_length) in archive.open_embedded_archive(name).toc.items():
+                sizes[module.split(".")[0]] += module_length
+        elif typecode in ("s", "o"):
+            # the entry script and pyinstaller's runtime options
+            sizes["(program)"] += length
+        else:
+            sizes[_package(name)] += length
+    sizes["(bootloader)"] += max(exe.stat().st_size - sum(sizes.values()), 0)
+
+
+def size_breakdown(artifact) -> dict:
+    """Bytes per package in a built program (a onedir folder or a single executable), largest first.
+
+    Files in a onedir folder are measured on disk. The archive pyinstaller appends to the executable is read with
+    PyInstaller's reader and split up using the compressed size of every entry, so the numbers add up to the size of
+    the artifact.
+    """
+    artifact = Path(artifact)
+    sizes = Counter()
+    if not artifact.is_dir():
+        _executable_sizes(artifact, sizes)
+        return dict(sizes.most_common())
+    internal = artifact / "_internal"
+    for path in artifact.rglob("*"):
+        # on Linux the Qt libraries are linked from the top level, count them once
+        if path.is_symlink() or not path.is_file():
+            continue
+        if internal in path.parents:
+            sizes[_package(path.relative_to(internal).as_posix())] += path.stat().st_size
+        else:
+            executable = Counter()
+            _executable_sizes(path, executable)
+            sizes.update(executable)
+    return dict(sizes.most_common())
+
+
+def print_size_breakdown(breakdown: dict, top: int = 15):
+    total = sum(breakdown.values())
+    print(f"\nArtifact size by package ({total / 1e6:.2f}MB total)")
+    for package, size in list(breakdown.items())[:top]:
+        print(f"  {package:<24} {size / 1e6:8.2f}MB {100 * size / max(total, 1):5.1f}%")
+    rest = sum(list(breakdown.values())[top:])
+    if rest:
+        print(f"  {'(other)':<24} {rest / 1e6:8.2f}MB {100 * rest / max(total, 1):5.1f}%")
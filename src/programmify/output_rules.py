@@ -0,0 +1,143 @@
+"""Declarative rules applied to the output of a process on its reader thread, before the lines reach the display.
+
+A rule is a regex and an action:
+    highlight: color the line (or only the matches, with `match_only`)
+    drop: hide the line from the display (it is still written to the log file)
+    count: count the matching lines
+    extract: record the number captured by the first group (or the group named by `group`) of the regex
+
+Rules run in order on every line, a line that was dropped is not seen by the rules after the one that dropped it.
+Highlighting is done by wrapping the text in ANSI color codes, which the display already renders (see
+programmify.ansi), so nothing is matched on the GUI thread.
+
+>>> rules = RuleSet([
+...     {"pattern": r"\\bERROR\\b", "action": "highlight", "color": "red"},
+...     {"pattern": r"\\bERROR\\b", "action": "count", "name": "errors"},
+...     {"pattern": r"GET /health", "action": "drop"},
+...     {"pattern": r"served in (\\d+\\.\\d+)ms", "action": "extract", "name": "latency ms"},
+... ])
+"""
+import re
+import threading
+import time
+
+from programmify import ansi
+
+actions = ("highlight", "drop", "count", "extract")
+
+color_names = {
+    "black": 0, "red": 1, "green": 2, "yellow": 3, "blue": 4, "magenta": 5, "cyan": 6, "white": 7, "gray": 8,
+    "bright_red": 9, "bright_green": 10, "bright_yellow": 11, "bright_blue": 12, "bright_magenta": 13,
+    "bright_cyan": 14, "bright_white": 15,
+}
+
+
+def color_code(color, bold: bool = False) -> str:
+    """The SGR sequence for a color name (see color_names), an (r, g, b) tuple or a #rrggbb string."""
+    if isinstance(color, str) and color.startswith("#"):
+        color = tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
+    elif isinstance(color, str):
+        if color not in color_names:
+            raise ValueError(f"Unknown color {color!r}, use one of {list(color_names)}, (r, g, b) or #rrggbb")
+        color = ansi.palette[color_names[color]]
+    codes = "38;2;{};{};{}".format(*color)
+    return f"\x1b[{'1;' if bold else ''}{codes}m"
+
+
+class Rule:
+    """One rule, see the module docstring. `streams` limits it to "stdout" or "stderr" lines."""
+
+    def __init__(self, pattern, action: str = "highlight", name: str = None, color="red", bold: bool = False,
+                 match_only: bool = False, group=1, streams=None, flags: int = 0):
+        if action not in actions:
+            raise ValueError(f"Unknown rule action {action!r}, use one of {actions}")
+        self.regex = pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+        self.action = action
+        self.name = name or f"{action} {self.regex.pattern}"
+        self.match_only = match_only
+        self.group = group
+        self.streams = (streams,) if isinstance(streams, str) else tuple(streams) if streams else None
+        self.start_code = color_code(color, bold) if action == "highlight" else ""
+        if action == "extract" and not self.regex.groups:
+            raise ValueError(f"Rule {self.name!r} extracts a number but its pattern has no group")
+        # updated by the reader thread only
+        self.hits = 0
+        self.seconds = 0.0
+        self.value = None
+        # values that parsed as numbers, the mean's denominator as hits also counts matches that did not
+        self.parsed = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "Rule":
+        return cls(**spec)
+
+    def _highlight(self, text: str, match) -> str:
+        if not self.match_only:
+            return f"{self.start_code}{text}\x1b[0m"
+        return self.regex.sub(lambda m: f"{self.start_code}{m.group(0)}\x1b[0m", text)
+
+    def _extract(self, match):
+        try:
+            value = float(match.group(self.group))
+        except (IndexError, TypeError, ValueError):
+            return
+        self.value = value
+        self.parsed += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+
+    def stats(self) -> dict:
+        stats = {"name": self.name, "action": self.action, "pattern": self.regex.pattern, "hits": self.hits,
+                 "seconds": self.seconds}
+        if self.action == "extract":
+            stats.update(value=self.value, parsed=self.parsed, mean=self.total / self.parsed if self.parsed else None,
+                         min=self.minimum, max=self.maximum)
+        return stats
+
+
+class RuleSet:
+    """Rules applied in order to every line by `apply`, with per-rule hit counts and time spent for tuning."""
+
+    def __init__(self, rules, timing: bool = True):
+        self.rules = [rule if isinstance(rule, Rule) else Rule.from_dict(rule) for rule in rules]
+        self.timing = timing
+        self.lines = 0
+        self.dropped = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def apply(self, line):
+        """The OutputLine to display for `line` (its text colored by highlight rules), None to drop it."""
+        # rules match the text as it was read, highlighting only changes what is displayed
+        original = text = line.text
+        clock = time.perf_counter
+        with self._lock:
+            self.lines += 1
+            for rule in self.rules:
+                if rule.streams is not None and line.stream not in rule.streams:
+                    continue
+                start = clock() if self.timing else 0
+                match = rule.regex.search(original)
+                if match is not None:
+                    rule.hits += 1
+                    if rule.action == "highlight":
+                        text = rule._highlight(text, match)
+                    elif rule.action == "extract":
+                        rule._extract(match)
+                if self.timing:
+                    rule.seconds += clock() - start
+                if match is not None and rule.action == "drop":
+                    self.dropped += 1
+                    return None
+        return line if text is original else line._replace(text=text)
+
+    def stats(self) -> dict:
+        """Lines seen and dropped, and the stats of every rule (hits, seconds, and value, parsed, mean, min and
+        max of extract rules), safe to call from any thread."""
+        with self._lock:
+            return {"lines": self.lines, "dropped": self.dropped, "seconds": time.monotonic() - self.started,
+                    "rules": [rule.stats() for rule in self.rules]}
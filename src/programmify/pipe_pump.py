@@ -0,0 +1,148 @@
+import codecs
+import locale
+import os
+import queue
+import selectors
+import threading
+import time
+from collections import namedtuple
+
+STDOUT = "stdout"
+STDERR = "stderr"
+
+# one line of output from a child process, timestamp is time.monotonic() when the line was read from the pipe
+OutputLine = namedtuple("OutputLine", ["stream", "timestamp", "text"])
+
+
+def resolve_encoding(encoding: str, errors: str = "strict") -> str:
+    """The name of the codec to decode output with: `encoding`, or the preferred encoding of the system for "locale".
+
+    Raises LookupError if there is no such codec or `errors` handler, so that a typo fails where the encoding is given
+    rather than on the thread reading the output.
+    """
+    if encoding == "locale":
+        encoding = locale.getpreferredencoding(False)
+    codecs.lookup(encoding)
+    codecs.lookup_error(errors)
+    return encoding
+
+
+class PipePump:
+    """Drain the stdout and stderr pipes of any number of processes at the same time.
+
+    Both pipes are read as soon as data is available so a child can never block on a full stderr pipe while we wait
+    on stdout. Lines are returned in the order they were read across both streams, tagged with the stream they came
+    from and the time they were read.
+
+    On posix the pipes are multiplexed with `selectors` on the calling thread, so reading any number of processes
+    takes no thread besides the caller's. Windows cannot select on anonymous pipes, so there each pipe still gets a
+    small daemon thread doing blocking reads into a shared queue: two threads per process, only the signals to the GUI
+    are shared.
+
+    Pipes are read `chunk_size` bytes at a time and decoded with an incremental decoder per pipe, so a multi-byte
+    character split between two reads is decoded once both halves arrived. `encoding` ("locale" for the encoding of
+    the system) and `errors` are passed to the decoder, see `codecs`. Only the line ending (\n or \r\n) is removed from the lines.
+    """
+
+    def __init__(self, chunk_size: int = 65536, encoding: str = "utf-8", errors: str = "replace"):
+        self.chunk_size = chunk_size
+        self.encoding = resolve_encoding(encoding, errors)
+        self.errors = errors
+        # (key, stream) => text of a partial line waiting for its newline
+        self._partial = {}
+        # (key, stream) => incremental decoder of the pipe
+        self._decoders = {}
+        self._open = 0
+        # key => number of its pipes that are still open
+        self._open_by_key = {}
+        self._finished = []
+        if os.name == "posix":
+            self._selector = selectors.DefaultSelector()
+            self._queue = None
+        else:
+            self._selector = None
+            self._queue = queue.Queue()
+
+    @property
+    def active(self) -> bool:
+        """Whether any registered pipe is still open."""
+        return self._open > 0
+
+    def register(self, key, process):
+        """Start reading the stdout and stderr pipes of `process`. Lines are returned by `poll` along with `key`."""
+        for stream, pipe in ((STDOUT, process.stdout), (STDERR, process.stderr)):
+            if pipe is None:
+                continue
+            self._partial[(key, stream)] = ""
+            self._decoders[(key, stream)] = codecs.getincrementaldecoder(self.encoding)(self.errors)
+            self._open += 1
+            self._open_by_key[key] = self._open_by_key.get(key, 0) + 1
+            if self._selector is not None:
+                os.set_blocking(pipe.fileno(), False)
+                self._selector.register(pipe.fileno(), selectors.EVENT_READ, (key, stream))
+            else:
+                thread = threading.Thread(target=self._read_pipe, args=(key, stream, pipe), daemon=True)
+                thread.start()
+
+    def _read_pipe(self, key, stream, pipe):
+        while True:
+            try:
+                data = pipe.read1(self.chunk_size)
+            except (OSError, ValueError):
+                data = b""
+            self._queue.put((key, stream, time.monotonic(), data))
+            if not data:
+                break
+
+    def poll(self, timeout: float = None):
+        """Wait up to `timeout` seconds (forever if None) for output and return a list of (key, OutputLine)."""
+        if not self._open:
+            return []
+        chunks = []
+        if self._selector is not None:
+            for selector_key, _ in self._selector.select(timeout):
+                key, stream = selector_key.data
+                try:
+                    data = os.read(selector_key.fd, self.chunk_size)
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    data = b""
+                if not data:
+                    self._selector.unregister(selector_key.fd)
+                chunks.append((key, stream, time.monotonic(), data))
+        else:
+            try:
+                chunks.append(self._queue.get(timeout=timeout))
+                while True:
+                    chunks.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+        lines = []
+        for key, stream, timestamp, data in chunks:
+            lines.extend((key, OutputLine(stream, timestamp, text)) for text in self._split(key, stream, data))
+        return lines
+
+    def _split(self, key, stream, data):
+        decoder = self._decoders[(key, stream)]
+        if not data:
+            # end of the stream, whatever is left is the last line
+            self._open -= 1
+            self._open_by_key[key] -= 1
+            if not self._open_by_key[key]:
+                del self._open_by_key[key]
+                self._finished.append(key)
+            rest = self._partial.pop((key, stream), "") + decoder.decode(b"", final=True)
+            del self._decoders[(key, stream)]
+            return [rest[:-1] if rest.endswith("\r") else rest] if rest else []
+        *complete, self._partial[(key, stream)] = (self._partial[(key, stream)] + decoder.decode(data)).split("\n")
+        return [line[:-1] if line.endswith("\r") else line for line in complete]
+
+    def pop_finished(self):
+        """Return the keys whose pipes have all been closed since the last call."""
+        finished, self._finished = self._finished, []
+        return finished
+
+    def close(self):
+        if self._selector is not None:
+            self._selector.close()
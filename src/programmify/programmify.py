@@ -1,321 +1,206 @@
 import argparse
+import os
 import sys
+import time
 from pathlib import Path
 import setproctitle
 
-import yaml
-from PyQt5 import QtWidgets, QtGui
+from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtWidgets import QMainWindow
 
-cfg_file = Path(__file__).parent / "programmify.cfg"
-default_mode = "window"
-default_name = None
-
-
-def png_to_ico(png_path: str, ico_path: str = None, size: int = 64):
-    png_path = str(Path(png_path).resolve())
-    if ico_path is None:
-        # replace .png with .ico
-        ico_path = png_path[:-4] + ".ico"
-    from PIL import Image
-    img = Image.open(png_path)
-    img.save(ico_path, sizes=[(size, size)])
-    return ico_path
-
-
-def png2ico():
-    """Command line utility to convert a .png file to a .ico file. Example usage:
-        $: png2ico favicon.png
-        $: png2ico favicon.png --size 32
-        $: png2ico favicon.png --ico_path favicon.ico --size 32
-    """
-    parser = argparse.ArgumentParser()
-    parser.add_argument("png_path", help="Path to the .png file")
-    parser.add_argument("--ico_path", help="Path to the .ico file")
-    parser.add_argument("--size", type=int, default=64, help="Icon size")
-    args = parser.parse_args()
-    png_to_ico(args.png_path, args.ico_path, args.size)
-
-# try to automatically find the default icon
-programmify_icon = Path(__file__).parent / "favicon.ico"
-default_icon = None
-
-
-def detect_icon(folder=Path.cwd()):
-    """Detect the default icon for the folder (uses current working directory by default)."""
-    folder = Path(folder).expanduser()
-    # if there is a favicon.ico file in the current directory, use it
-    if (folder / "favicon.ico").exists():
-        default_icon = str((folder / "favicon.ico").resolve())
-    else:
-        # if there is exactly one .ico file in the current directory, use it
-        ico_files = list(folder.glob("*.ico"))
-        if len(ico_files) == 1:
-            default_icon = str(ico_files[0].resolve())
-        else:
-            # if there is only one .png file in the current directory, convert it to .ico and use it
-            png_files = list(folder.glob("*.png"))
-            if len(png_files) == 1:
-                try:
-                    default_icon = png_to_ico(png_files[0])
-                except Exception as e:
-                    print(f"Failed to convert {png_files[0]} to .ico: {e}")
-            else:
-                # if there is no .ico file in the current directory, use the default icon
-                default_icon = None
-    return default_icon
-
-
-default_icon = detect_icon()
-
-if default_icon is None:
-    default_icon = detect_icon(Path(__file__).parent)
-if default_icon is None:
-    default_icon = str(programmify_icon.resolve())
-
-
-if cfg_file.exists():
-    with open(cfg_file) as f:
-        cfg = yaml.safe_load(f)
-        default_mode = cfg.get("mode", default_mode)
-        default_name = cfg.get("name", default_name)
-        default_icon = cfg.get("icon", default_icon)
-
-
-def detect_main_file(folder=Path.cwd()):
-    """Detect the main file to use for building the program."""
-    folder = Path(folder).expanduser()
-    # if there is only one .py file in the current directory, use it
-    py_files = list(folder.glob("*.py"))
-    py_files = [f for f in py_files if f.name != "__init__.py"]
-    if len(py_files) == 1:
-        return str(py_files[0].resolve())
-    for test_path in ["main.py", "__main__.py", f"{folder.name}.py"]:
-        if (folder / test_path).exists():
-            return str((folder / test_path).resolve())
-    if (folder / "src").exists():
-        if (folder / "src").glob("*.py"):
-            return detect_main_file(folder / "src")
-        else:
-            possible_src_files = []
-            for f in (folder / "src").glob("*"):
-                if not f.is_dir():
-                    continue
-                try:
-                    main_file = detect_main_file(f)
-                    if main_file:
-                        possible_src_files.append(main_file)
-                except FileNotFoundError:
-                    pass
-            if len(possible_src_files) == 1:
-                return possible_src_files[0]
-    raise FileNotFoundError("Could not detect main file. Please specify the file to build, e.g. programmify build my_program.py")
-
-
-def build():
-    # if the first argument does not start with a hyphen, try to detect file to use
-    # try main.py, __main__.py, or if there is only one .py file in the current directory, use it
-    if (len(sys.argv) <= 1) or sys.argv[1].startswith("-") and ("--help" not in sys.argv) and ("-h" not in sys.argv):
-        file = detect_main_file()
-        # insert the detected file as the first argument
-        sys.argv.insert(1, file)
-
-    parser = argparse.ArgumentParser()
-    parser.add_argument("file", help="""File to build.
-    If not specified, will try ...
-        1. main.py in current working directory if found
-        2. __main__.py
-        3. the only .py file in the current working directory if only one is found (excluding __init__.py)
-        4. if there is a src directory, will search in src and its subdirectories to find a single option
-        5. if the above fails, will raise an error and you will need to specify the file to build.
-    """)
-    parser.add_argument("--name", default=default_name,
-                        help="Program name. If not specified, the name of the either the file or its parent directory will be used.")
-    parser.add_argument("--dst", help="Destination directory for the built program")
-    parser.add_argument("--icon", default=default_icon,
-                        help="Path to a 16x16 .ico file. If not specified, will try to find favicon.ico or any other .ico or .png in the current working directory.")
-    parser.add_argument("--mode", default=default_mode, help="Program mode: window or widget")
-    parser.add_argument("--nocleanup", action="store_false", help="Cleanup build files", dest="cleanup")
-    parser.add_argument("--show_cmd", action="store_true", help="Show the command that will be run instead of running it")
-    parser.add_argument("--cmd", help="Expert level: command to run instead of pyinstaller")
-    parser.add_argument("--hidden_imports", nargs="*", help="Hidden imports")
-    parser.add_argument("--extra-files", nargs="*", help="Extra files to include")
-    parser.add_argument("--debug", action="store_false", help="Does not run in windowed mode, instead shows the terminal and stdout", dest="windowed")
-    parser.add_argument("--args", nargs=argparse.REMAINDER, help="Additional arguments to pass to pyinstaller")
-    parser.add_argument("--desktop", action="store_true", help="Copy the file to the desktop")
-    parser.add_argument("--version", help="Adds the version string to the end of the program name. e.g. --version 1 => my_program v1")
-
-    args = parser.parse_args()
-    _build(file=args.file, name=args.name, dst=args.dst, version=args.version,
-           icon=args.icon, mode=args.mode, cleanup=args.cleanup,
-           hidden_imports=args.hidden_imports, extra_files=args.extra_files, windowed=args.windowed,
-           cmd=args.cmd, args=args.args, desktop=args.desktop, show_cmd=args.show_cmd)
-
-
-def _build(file: str = None,
-           name: str = default_name,
-           dst: str = None,
-           version: str = None,
-           icon: str = default_icon,
-           mode: str = default_mode,
-           args: list = None,
-           cmd: list = None,
-           hidden_imports: list = None,
-           extra_files: list = None,
-           windowed: bool = True,
-           cleanup: bool = True,
-           show_cmd: bool = False,
-           desktop: bool = False
-           ):
-    print(f"Building {file} as {name} with icon {icon}")
-    if file in [".", "__file__"]:
-        file = __file__
-    if name is None:
-        name = Path(file).stem
-        if name in ["__main__", "main"]:
-            name = Path(file).parent.name
-    if version:
-        name = f"{name} v{version}"
-
-    if dst is None:
-        dst = Path.cwd() / f"{name}.exe"
-    dst = Path(dst).expanduser()
-
-    if isinstance(hidden_imports, str):
-        hidden_imports = [v.strip() for v in hidden_imports.replace(" ", ",").split(",")]
-    if isinstance(extra_files, str):
-        extra_files = [v.strip() for v in extra_files.replace(" ", ",").split(",")]
-
-    if icon.endswith(".png"):
-        icon = png_to_ico(icon)
-
-    # make a temporary config
-    with open(cfg_file, "w") as f:
-        print("dumping", {"name": name, "mode": mode})
-        f.write(yaml.dump({"name": name, "mode": mode}))
-    print(f"dumped to {cfg_file}: {cfg_file.read_text()}")
-    if cmd is None:
-        cmd = ["pyinstaller", "--onefile", "--windowed",
-               "--distpath", str(dst.parent.resolve()),
-               f"--icon={icon}", "--add-data", f"{icon};programmify",
-               "--add-data", f"{cfg_file};programmify",
-               "--add-data", f"{str(Path(__file__).parent / "subprocess_program.py")};programmify",
-               "--add-data", f"{__file__};.",
-               "--hidden-import", "setproctitle",
-               "--hidden-import", "yaml"]
-        if not windowed:
-            cmd.remove("--windowed")
-        for extra_file in extra_files or []:
-            cmd.extend(["--add-data", f"{extra_file};."])
-        for hidden_import in hidden_imports or []:
-            cmd.extend(["--hidden-import", hidden_import])
-        cmd.append(file)
-    if args:
-        cmd.extend(args)
-    src = dst.parent / f"{Path(file).stem}.exe"
-    return _build_from_cmd(cmd, src, dst, cleanup=cleanup, show_cmd=show_cmd, desktop=desktop)
-
-
-def _build_from_cmd(cmd: list,
-                    src,
-                    dst,
-                    cleanup: bool = True,
-                    show_cmd: bool = False,
-                    desktop: bool = False
-                    ):
-
-    if isinstance(cmd, str):
-        cmd = [v.strip() for v in cmd.split(" ") if v.strip()]
-    if show_cmd:
-        print(" ".join(cmd))
-        return cmd
-    import shutil
-    import subprocess
-
-    # preclean
-    if cleanup and Path("build").exists():
-        raise Exception("Build directory exists. Please remove it before building or use flag --nocleanup. Trying to avoid deleting files that you may want to keep.")
-
-    # verify the name is not already a valid command
-    if shutil.which(dst.stem) and not dst.exists():
-        RED = "\033[91m"
-        BOLD = "\033[1m"
-        RESET = "\033[0m"
-        print(f"{RED}{BOLD}{dst.stem}{RESET}{RED} is already a valid command. Please choose a different name{RESET}.")
-        sys.exit(1)
-
-    # build
-    try:
-        subprocess.run(cmd, check=True)
-    except subprocess.CalledProcessError as e:
-        RED = "\033[91m"
-        BOLD = "\033[1m"
-        RESET = "\033[0m"
-        print(f"{RED}{BOLD}Failed to build {dst}{RESET}{RED}. Please check the error message above ^{RESET}.")
-        sys.exit(1)
-
-    print(f"Built {dst}")
-    shutil.move(src, dst)
-    if desktop:
-        # copy the file to the desktop
-        shutil.copy(dst, Path.home() / "Desktop" / dst.name)
-
-    # cleanup
-    if cleanup:
-        shutil.rmtree("dist", ignore_errors=True)
-        shutil.rmtree("build", ignore_errors=True)
-        # remove all .spec files
-        spec_file = f"{Path(src.stem)}.spec"
-        if Path(spec_file).exists():
-            Path(spec_file).unlink()
-        if cfg_file.exists():
-            cfg_file.unlink()
-
-    print(f"Built {dst}")
-
-    GRAY = "\033[90m"
-    RESET = "\033[0m"
-
-    print(f"""Built {dst}
-    
-To run the program:
-    a. Open your File Explorer and double-click the file {dst}
-    b. Open a command prompt and run the command `{GRAY}{dst}{RESET}
-    c. In the command prompt if you are in the same directory as the file, you can run `{GRAY}{dst.stem}{RESET}`
-""")
+from programmify.instrumentation import Instrumentation, span
+from programmify.builder import (cfg_file, programmify_icon, ico_sizes, png_to_ico, png2ico, detect_icon,
+                                 detect_main_file, get_defaults, build, _build, _build_from_cmd)
+
+
+def __getattr__(name):
+    # default_name, default_mode and default_icon are detected on first use, see programmify.builder
+    if name in ("default_name", "default_mode", "default_icon"):
+        return get_defaults()[name[len("default_"):]]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class Programmify:
-    def __init__(self, name: str = default_name, icon: str = default_icon, **kwargs):
+    # record startup timings and event loop stalls, see programmify.instrumentation
+    instrument = False
+    # forward the arguments of later launches to the running instance instead of starting another one, True to key the
+    # instance on the program name or a string key, see handle_new_instance
+    single_instance = False
+    # start with only the tray icon, setupUI runs when the window is first opened from the tray, see ensure_ui
+    tray_only = False
+    # with tray_only, delete what setupUI built whenever the window is closed, see teardownUI
+    teardown_on_close = False
+    # let SubprocessWidget and SupervisorWidget draw whether their processes are running, failed or done over the tray
+    # icon, see set_tray_state
+    tray_status = False
+    # run an asyncio event loop on the GUI thread together with Qt's, see programmify.async_loop
+    use_asyncio = False
+    # size of the thread and process pools of run_task (None for the number of CPUs) and how many tasks may be waiting
+    # or running at once, see programmify.tasks
+    task_threads = None
+    task_processes = None
+    task_max_pending = 256
+
+    def __init__(self, name: str = None, icon: str = None, tray_only: bool = None, teardown_on_close: bool = None,
+                 **kwargs):
         if name is None:
-            name = default_name
+            name = get_defaults()["name"]
         if icon is None:
-            icon = default_icon
+            icon = get_defaults()["icon"]
         super().__init__(**kwargs)
+        if tray_only is not None:
+            self.tray_only = tray_only
+        if teardown_on_close is not None:
+            self.teardown_on_close = teardown_on_close
+        self.ui_ready = False
+        self._ui_widgets = []
+        self._ui_layout = None
+        self._tray_renderer = None
+        self._tray_key = None
         self.trayIcon = QtWidgets.QSystemTrayIcon(self)
         self.name = self.set_name(name)
-        self.icon, self.trayIcon, self.icon_path = self.set_icon(icon)
-        self.setupUI()
+        with span(f"{type(self).__name__}.set_icon"):
+            self.icon, self.trayIcon, self.icon_path = self.set_icon(icon)
+        # without a tray icon there would be no way to open the window
+        if self.tray_only and not (self.trayIcon and QtWidgets.QSystemTrayIcon.isSystemTrayAvailable()):
+            self.tray_only = False
+        if self.tray_only:
+            self.setup_tray_menu()
+        else:
+            self.ensure_ui()
 
-    png_to_ico = png_to_ico
+    png_to_ico = staticmethod(png_to_ico)
 
     def setupUI(self):
         pass
 
+    def ensure_ui(self):
+        """Run setupUI if it has not run yet (or since the last teardownUI)."""
+        if self.ui_ready:
+            return
+        before = set(self.findChildren(QtWidgets.QWidget, options=QtCore.Qt.FindDirectChildrenOnly))
+        layout = self.layout()
+        with span(f"{type(self).__name__}.setupUI"):
+            self.setupUI()
+        self.ui_ready = True
+        # remember what setupUI added so teardownUI deletes exactly that
+        self._ui_widgets = [w for w in self.findChildren(QtWidgets.QWidget, options=QtCore.Qt.FindDirectChildrenOnly)
+                            if w not in before]
+        self._ui_layout = self.layout() if self.layout() is not layout else None
+
+    def teardownUI(self):
+        """Delete the widgets and layout added by setupUI, called on close with `teardown_on_close`.
+
+        Override to also stop what setupUI started (timers, threads, ...) and call super().teardownUI().
+        """
+        for widget in self._ui_widgets:
+            widget.setParent(None)
+            widget.deleteLater()
+        if self._ui_layout is not None and self.layout() is self._ui_layout:
+            # a layout cannot be removed from a widget, only moved to another one that then deletes it
+            QtWidgets.QWidget().setLayout(self._ui_layout)
+        self._ui_widgets = []
+        self._ui_layout = None
+        self.ui_ready = False
+
+    def setVisible(self, visible: bool):
+        # every way of showing the window (show, showNormal, ...) goes through here
+        if visible:
+            self.ensure_ui()
+        super().setVisible(visible)
+
+    def closeEvent(self, event):
+        super().closeEvent(event)
+        if self.tray_only and self.teardown_on_close and event.isAccepted() and self.ui_ready:
+            # after the close event has been handled, the widgets may still be in use while it is delivered
+            QtCore.QTimer.singleShot(0, self._teardown_if_hidden)
+
+    def _teardown_if_hidden(self):
+        if self.ui_ready and not self.isVisible():
+            self.teardownUI()
+
+    def setup_tray_menu(self):
+        """Context menu of the tray icon in tray_only mode, and open the window when the icon is clicked."""
+        self.tray_menu = QtWidgets.QMenu()
+        self.tray_menu.addAction(f"Open {self.name}" if self.name else "Open", self.raise_window)
+        self.tray_menu.addSeparator()
+        self.tray_menu.addAction("Quit", QtWidgets.QApplication.quit)
+        self.trayIcon.setContextMenu(self.tray_menu)
+        self.trayIcon.activated.connect(self._tray_activated)
+
+    def _tray_activated(self, reason):
+        if reason in (QtWidgets.QSystemTrayIcon.Trigger, QtWidgets.QSystemTrayIcon.DoubleClick):
+            if self.isVisible() and self.isActiveWindow():
+                self.hide()
+            else:
+                self.raise_window()
+
+    def handle_new_instance(self, argv: list, cwd: str):
+        """Called with the argv and working directory of a later launch when running with `single_instance`.
+
+        Override to act on the arguments (e.g. open the files passed), the default brings the window to the front.
+        """
+        self.raise_window()
+
+    def raise_window(self):
+        if self.isMinimized():
+            self.showNormal()
+        else:
+            self.show()
+        self.raise_()
+        self.activateWindow()
+
+    @property
+    def tasks(self):
+        """The TaskManager shared by the whole app, configured by the task_* attributes of the first window using it."""
+        from programmify.tasks import TaskManager
+        return TaskManager.shared(threads=self.task_threads, processes=self.task_processes,
+                                  max_pending=self.task_max_pending)
+
+    def run_task(self, fn, *args, process: bool = False, with_context: bool = False, **kwargs):
+        """Run `fn(*args, **kwargs)` on a worker thread (or process) and return a TaskHandle, whose progress_signal,
+        result_signal, error_signal and cancelled_signal are delivered on the GUI thread.
+
+        >>> handle = self.run_task(checksum, path)
+        >>> handle.result_signal.connect(self.label.setText)
+        """
+        from programmify.tasks import THREAD, PROCESS
+        return self.tasks.submit(fn, *args, kind=PROCESS if process else THREAD, with_context=with_context, **kwargs)
+
     def set_icon(self, icon_path: str):
         if not icon_path:
             return None, None, None
         if not Path(icon_path).exists():
             raise FileNotFoundError(f"Icon file not found: {icon_path}")
         if icon_path.endswith(".png"):
-            icon_path = self.png_to_ico(icon_path)
+            icon_path = self.png_to_ico(icon_path, sizes=ico_sizes)
         self.icon_path = str(Path(icon_path).resolve())
         self.icon = QtGui.QIcon(self.icon_path)
         self.setWindowIcon(self.icon)
+        # the state drawn on the tray icon was drawn on the previous icon
+        self._tray_renderer = None
+        self._tray_key = None
         self.trayIcon.setIcon(self.icon)
         self.trayIcon.setVisible(True)
         return self.icon, self.trayIcon, self.icon_path
 
+    def set_tray_state(self, state: str = None, progress: float = None, badge=None):
+        """Show live state on the tray icon: a status dot ("idle", "running", "busy", "warning", "error", "done"), a
+        progress ring (0 to 1) and a badge (a number or up to 3 characters). None removes each of them.
+
+        The icons are drawn once per combination and cached (see programmify.tray_icon), calling this on every
+        update is cheap.
+        """
+        if not self.trayIcon or self.icon is None:
+            return
+        if self._tray_renderer is None:
+            from programmify.tray_icon import TrayIconRenderer
+            self._tray_renderer = TrayIconRenderer(self.icon)
+        key = self._tray_renderer.key(state, progress, badge)
+        if key != self._tray_key:
+            self._tray_key = key
+            self.trayIcon.setIcon(self._tray_renderer.icon(state, progress, badge))
+
     def set_name(self, title: str):
         self.name = title
         if title:
@@ -326,27 +211,86 @@ class Programmify:
         return self.name
 
     @classmethod
-    def parse_args(cls):
+    def parse_args(cls, known_only: bool = False):
+        """--icon and --name from the command line. With `known_only` other arguments are left to the program (they
+        stay in sys.argv) instead of being an error."""
+        defaults = get_defaults()
         parser = argparse.ArgumentParser()
-        parser.add_argument("--icon", default=default_icon, help="Icon file path")
-        parser.add_argument("--name", default=default_name, help="Program name")
-        args = parser.parse_args()
+        parser.add_argument("--icon", default=defaults["icon"], help="Icon file path")
+        parser.add_argument("--name", default=defaults["name"], help="Program name")
+        args = parser.parse_known_args()[0] if known_only else parser.parse_args()
         kwargs = vars(args)
         return kwargs
 
     @classmethod
     def run(cls, **kw):
-        kwargs = cls.parse_args()
+        # a single instance program is launched with arguments for the running instance, e.g. files to open, they are
+        # forwarded to it by _run and must not fail here
+        kwargs = cls.parse_args(known_only=bool(kw.get("single_instance", cls.single_instance)))
         kwargs.update(kw)
         return cls._run(**kwargs)
 
     @classmethod
     def _run(cls, *args, **kwargs):
         print(f"Running {cls.__name__}")
+        instrumentation = Instrumentation.from_env(kwargs.pop("instrument", cls.instrument))
+        single_instance = kwargs.pop("single_instance", cls.single_instance)
+        use_asyncio = kwargs.pop("use_asyncio", cls.use_asyncio)
+        server = None
+        if single_instance:
+            from programmify.single_instance import SingleInstanceServer, server_name, forward_args
+            key = single_instance if isinstance(single_instance, str) else kwargs.get("name") or get_defaults()["name"]
+            name = server_name(f"{cls.__module__}.{cls.__qualname__}:{key}")
+            # before the QApplication, so that a second launch costs no more than connecting to a socket
+            if forward_args(name, sys.argv):
+                print(f"{key} is already running, forwarded the arguments to it")
+                sys.exit(0)
         app = QtWidgets.QApplication(sys.argv)
+        if single_instance:
+            server = SingleInstanceServer(name, app)
+            if not server.listen():
+                # another instance started at the same time and won
+                if forward_args(name, sys.argv):
+                    sys.exit(0)
+                print(f"Could not listen for other instances of {key}: {server.server.errorString()}")
+        loop = None
+        if use_asyncio:
+            import asyncio
+            from programmify.async_loop import QtEventLoop
+            # set before the window is created so setupUI can already schedule tasks
+            loop = QtEventLoop(app)
+            asyncio.set_event_loop(loop)
+        if instrumentation is not None:
+            Instrumentation.current = instrumentation
+            instrumentation.mark("qapplication")
+            app.aboutToQuit.connect(instrumentation.close)
         window = cls(*args, **kwargs)
-        window.show()
-        sys.exit(app.exec_())
+        window.instrumentation = instrumentation
+        if window.tray_only:
+            # the window is opened from the tray icon, closing it must not quit
+            app.setQuitOnLastWindowClosed(False)
+        if server is not None:
+            window.instance_server = server
+            server.message_signal.connect(window.handle_new_instance)
+            app.aboutToQuit.connect(server.close)
+        if instrumentation is not None:
+            instrumentation.watch(window)
+        if window.tray_only:
+            if instrumentation is not None:
+                instrumentation.mark("tray_ready")
+        else:
+            window.show()
+        probe = os.environ.get("PROGRAMMIFY_LAUNCH_PROBE")
+        if probe:
+            # used by benchmarks/launch_latency.py: record when the window is up and the event loop running, then quit
+            QtCore.QTimer.singleShot(0, lambda: cls._launch_probe(probe, app))
+        sys.exit(loop.exec_() if loop is not None else app.exec_())
+
+    @staticmethod
+    def _launch_probe(path: str, app):
+        with open(path, "a") as f:
+            f.write(f"{time.time()}\n")
+        app.quit()
 
 
 class ProgrammifyWidget(Programmify, QtWidgets.QWidget):
@@ -354,7 +298,7 @@ class ProgrammifyWidget(Programmify, QtWidgets.QWidget):
 
 
 class ProgrammifyMainWindow(Programmify, QMainWindow):
-    def __init__(self, name: str = default_name, icon: str = default_icon, **kwargs):
+    def __init__(self, name: str = None, icon: str = None, **kwargs):
         super().__init__(**kwargs)
 
         # Initialize your Programmify widget
@@ -364,7 +308,8 @@ class ProgrammifyMainWindow(Programmify, QMainWindow):
         self.setCentralWidget(self.program_widget)
 
         # Additional QMainWindow setup (like menus, toolbars, status bar, etc.) goes here
-        self.setupUI()
+        if not self.tray_only:
+            self.setupUI()
 
     def setupUI(self):
         pass
@@ -0,0 +1,238 @@
+"""Index of the programs in a project tree, used to detect the file to build.
+
+The tree is walked once with os.scandir, skipping ignored folders (version control, virtual environments, build output
+and the patterns in .gitignore and .programmifyignore). Python files that may define or run a Programmify program are
+parsed with ast, and the result for every file is cached by its mtime and size so indexing a large repo again only
+parses what changed.
+
+An entry point is a file that calls `.run()` on a Programmify class: one of programmify's own (`SubprocessWidget.run`)
+or a subclass of one, defined in the file itself or imported from another file of the project.
+"""
+import ast
+import fnmatch
+import hashlib
+import json
+import os
+from collections import namedtuple
+from pathlib import Path
+
+from programmify.builder import cache_dir
+
+EntryPoint = namedtuple("EntryPoint", ["file", "classes", "kind"])
+
+# the classes programmify provides, and the kind of program each subclass builds
+programmify_classes = {"Programmify": "widget", "ProgrammifyWidget": "widget", "ProgrammifyMainWindow": "window",
+                       "SubprocessWidget": "widget", "SupervisorWidget": "widget"}
+
+default_ignore = [".*", "__pycache__", "node_modules", "venv", "env", "build", "dist", "site-packages", "*.egg-info"]
+ignore_files = [".gitignore", ".programmifyignore"]
+
+# files without any of these cannot define or run a program, they are not parsed
+_markers = [b"Programmify", b"SubprocessWidget", b"SupervisorWidget", b".run("]
+
+# bumped whenever the cached information changes shape
+_index_version = 1
+
+
+def read_ignore_patterns(root) -> list:
+    """The patterns of .gitignore and .programmifyignore in `root`. Negations (!pattern) are not supported and skipped."""
+    patterns = []
+    for name in ignore_files:
+        try:
+            lines = (Path(root) / name).read_text(errors="replace").splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith(("#", "!")):
+                patterns.append(line)
+    return patterns
+
+
+def _ignored(rel: str, name: str, patterns: list) -> bool:
+    for pattern in patterns:
+        anchored = pattern.strip("/")
+        # like .gitignore, a pattern with a slash in it is matched against the path from the root, others by name
+        if "/" in anchored:
+            if fnmatch.fnmatch(rel, anchored):
+                return True
+        elif fnmatch.fnmatch(name, anchored):
+            return True
+    return False
+
+
+def iter_python_files(root, ignore: list = None):
+    """Yield (path relative to `root` with forward slashes, os.DirEntry) of every .py file under `root` not ignored."""
+    root = str(root)
+    patterns = default_ignore + read_ignore_patterns(root) + list(ignore or [])
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            entries = list(os.scandir(os.path.join(root, rel_dir)))
+        except OSError:
+            continue
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            if _ignored(rel, entry.name, patterns):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(rel)
+            elif entry.name.endswith(".py") and entry.is_file():
+                yield rel, entry
+
+
+def _base_name(node) -> str:
+    """`Name` of `class X(Name)` or `class X(module.Name)`."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return None
+
+
+def scan_file(data: bytes, filename: str = "<file>") -> dict:
+    """Classes, `.run()` calls and imports of one file, as cached by the index."""
+    info = {"classes": {}, "runs": [], "imports": {}}
+    if not any(marker in data for marker in _markers):
+        return info
+    try:
+        tree = ast.parse(data, filename)
+    except (SyntaxError, ValueError):
+        return info
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            info["classes"][node.name] = [b for b in map(_base_name, node.bases) if b]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            for alias in node.names:
+                info["imports"][alias.asname or alias.name] = [node.module, alias.name]
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "run"
+              and _base_name(node.func.value)):
+            info["runs"].append(_base_name(node.func.value))
+    return info
+
+
+def _kinds(classes: dict, known: dict) -> dict:
+    """The kind of every class in `classes` that derives from a class in `known` (name -> kind), directly or through
+    other classes of the same file."""
+    kinds = {}
+    changed = True
+    while changed:
+        changed = False
+        for name, bases in classes.items():
+            if name in kinds:
+                continue
+            for base in bases:
+                kind = kinds.get(base) or known.get(base)
+                if kind:
+                    kinds[name] = kind
+                    changed = True
+                    break
+    return kinds
+
+
+class ProjectIndex:
+    """Every Programmify entry point under `root`, see `entry_points`."""
+
+    def __init__(self, root=None, ignore: list = None, cache: bool = True):
+        self.root = Path.cwd() if root is None else Path(root).expanduser().resolve()
+        self.ignore = ignore
+        self.cache = cache
+        self.files = {}
+        self.parsed = 0
+
+    @property
+    def cache_file(self) -> Path:
+        key = hashlib.sha256(str(self.root).encode()).hexdigest()[:16]
+        return cache_dir() / "index" / f"{self.root.name}-{key}.json"
+
+    def _load_cache(self) -> dict:
+        try:
+            cached = json.loads(self.cache_file.read_text())
+        except (OSError, ValueError):
+            return {}
+        return cached.get("files", {}) if cached.get("version") == _index_version else {}
+
+    def _save_cache(self):
+        path = self.cache_file
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"version": _index_version, "root": str(self.root), "files": self.files}))
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+    def update(self) -> "ProjectIndex":
+        """Walk the tree and scan every new or modified file."""
+        cached = self._load_cache() if self.cache else {}
+        files = {}
+        for rel, entry in iter_python_files(self.root, self.ignore):
+            stat = entry.stat()
+            previous = cached.get(rel)
+            if previous and previous["mtime_ns"] == stat.st_mtime_ns and previous["size"] == stat.st_size:
+                files[rel] = previous
+                continue
+            try:
+                with open(entry.path, "rb") as f:
+                    info = scan_file(f.read(), entry.path)
+            except OSError:
+                continue
+            self.parsed += 1
+            files[rel] = dict(info, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        self.files = files
+        if self.cache and files != cached:
+            self._save_cache()
+        return self
+
+    def _known(self, info: dict, modules: dict) -> dict:
+        """Programmify classes usable in a file: programmify's own and those it imports from the project."""
+        known = dict(programmify_classes)
+        for alias, (module, name) in info["imports"].items():
+            if name in modules.get(module, {}):
+                known[alias] = modules[module][name]
+            elif module.split(".")[0] == "programmify" and name in programmify_classes:
+                known[alias] = programmify_classes[name]
+        return known
+
+    def entry_points(self) -> list:
+        """Every file that runs a Programmify program, shallowest first."""
+        if not self.files:
+            self.update()
+        # module name -> {class: kind}, until classes deriving from classes of other local modules are all resolved
+        modules = {}
+        # every pass resolves one more level of inheritance across files, bounded in case two files share a module name
+        for _ in range(len(self.files) + 1):
+            previous = dict(modules)
+            for rel, info in self.files.items():
+                kinds = _kinds(info["classes"], self._known(info, modules))
+                for module in _module_names(rel):
+                    modules[module] = kinds
+            if modules == previous:
+                break
+        entry_points = []
+        for rel, info in self.files.items():
+            known = self._known(info, modules)
+            kinds = dict(_kinds(info["classes"], known), **known)
+            ran = [name for name in info["runs"] if name in kinds]
+            if ran:
+                entry_points.append(EntryPoint(str(self.root / rel), ran, kinds[ran[0]]))
+        return sorted(entry_points, key=lambda e: (len(Path(e.file).relative_to(self.root).parts), e.file))
+
+
+def _module_names(rel: str) -> list:
+    """Names `rel` can be imported as: from the root, and from a src folder on the way to it."""
+    parts = rel[:-len(".py")].split("/")
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    names = [".".join(parts)]
+    if "src" in parts:
+        names.append(".".join(parts[parts.index("src") + 1:]))
+    return [name for name in names if name]
+
+
+def find_entry_points(root=None, ignore: list = None, cache: bool = True) -> list:
+    """Every file under `root` (the current working directory by default) that runs a Programmify program, as
+    EntryPoint(file, classes, kind) tuples, shallowest first. `ignore` adds patterns to the ignored folders and
+    files."""
+    return ProjectIndex(root, ignore, cache).entry_points()
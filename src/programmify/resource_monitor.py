@@ -0,0 +1,231 @@
+"""CPU, memory and disk I/O of a child process and all of its descendants.
+
+On Linux the numbers come straight from /proc (`stat` and `io` of every process in the tree, found through
+/proc/<pid>/task/<pid>/children), which costs a few small reads per process and sample. Elsewhere psutil is used if it
+is installed, otherwise the monitor reports nothing.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from PyQt5 import QtCore
+
+spark_chars = "▁▂▃▄▅▆▇█"
+
+
+def sparkline(values, maximum: float = None) -> str:
+    """One block character per value, scaled to `maximum` (the largest value by default)."""
+    values = list(values)
+    if not values:
+        return ""
+    top = maximum or max(values) or 1
+    return "".join(spark_chars[min(len(spark_chars) - 1, int(v / top * (len(spark_chars) - 1) + 0.5))] for v in values)
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(n) < 1024 or unit == "GB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+
+
+class ProcessTreeSampler:
+    """Totals of a process and its descendants, rates computed between consecutive calls of `sample`."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self._last = None
+        self._proc = os.path.isdir(f"/proc/{pid}")
+        self._children_files = True
+        self._ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self._page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _descendants_proc(self) -> list:
+        pids = [self.pid]
+        if self._children_files:
+            if not os.path.exists(f"/proc/{self.pid}/task/{self.pid}/children") and os.path.isdir(f"/proc/{self.pid}"):
+                # kernel without CONFIG_PROC_CHILDREN, walk every process instead
+                self._children_files = False
+                return self._descendants_proc()
+            i = 0
+            while i < len(pids):
+                # each thread lists the children it started, not only the main one
+                try:
+                    tasks = [entry.name for entry in os.scandir(f"/proc/{pids[i]}/task")]
+                except OSError:
+                    tasks = []
+                for task in tasks:
+                    try:
+                        with open(f"/proc/{pids[i]}/task/{task}/children") as f:
+                            pids.extend(int(child) for child in f.read().split() if int(child) not in pids)
+                    except OSError:
+                        pass
+                i += 1
+            return pids
+        parents = {}
+        for entry in os.scandir("/proc"):
+            if entry.name.isdigit():
+                stat = self._read_stat(int(entry.name))
+                if stat:
+                    parents.setdefault(stat[0], []).append(int(entry.name))
+        i = 0
+        while i < len(pids):
+            pids.extend(parents.get(pids[i], []))
+            i += 1
+        return pids
+
+    @staticmethod
+    def _read_stat(pid: int):
+        """(ppid, utime + stime in ticks, rss in pages) of `pid`, or None if it is gone."""
+        try:
+            with open(f"/proc/{pid}/stat", "rb") as f:
+                # the process name may contain spaces, the fields we want come after its closing parenthesis
+                fields = f.read().rsplit(b")", 1)[1].split()
+        except (OSError, IndexError):
+            return None
+        return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[21])
+
+    @staticmethod
+    def _read_io(pid: int):
+        """(read_bytes, write_bytes) of `pid`, or None if not allowed."""
+        try:
+            with open(f"/proc/{pid}/io", "rb") as f:
+                values = dict(line.split(b":") for line in f.read().splitlines() if b":" in line)
+            return int(values[b"read_bytes"]), int(values[b"write_bytes"])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _totals_proc(self):
+        processes = cpu = rss = read = write = 0
+        for pid in self._descendants_proc():
+            stat = self._read_stat(pid)
+            if stat is None:
+                continue
+            processes += 1
+            cpu += stat[1] / self._ticks
+            rss += stat[2] * self._page_size
+            io = self._read_io(pid)
+            if io:
+                read += io[0]
+                write += io[1]
+        return processes, cpu, rss, read, write
+
+    def _totals_psutil(self):
+        try:
+            import psutil
+        except ImportError:
+            return None
+        try:
+            root = psutil.Process(self.pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        processes = cpu = rss = read = write = 0
+        for proc in procs:
+            try:
+                with proc.oneshot():
+                    times = proc.cpu_times()
+                    cpu += times.user + times.system
+                    rss += proc.memory_info().rss
+                    if hasattr(proc, "io_counters"):
+                        io = proc.io_counters()
+                        read += io.read_bytes
+                        write += io.write_bytes
+                processes += 1
+            except psutil.Error:
+                continue
+        return processes, cpu, rss, read, write
+
+    def sample(self) -> dict:
+        """{"processes", "cpu_percent", "rss", "read_rate", "write_rate"} (bytes and bytes/s), None once the process
+        is gone or cannot be measured. CPU% is of one core, so can go over 100 for multi-threaded processes."""
+        totals = self._totals_proc() if self._proc else self._totals_psutil()
+        if not totals or not totals[0]:
+            return None
+        now = time.monotonic()
+        processes, cpu, rss, read, write = totals
+        sample = {"time": time.time(), "processes": processes, "cpu_percent": 0.0, "rss": rss, "read_rate": 0.0,
+                  "write_rate": 0.0}
+        if self._last is not None:
+            last_time, last_cpu, last_read, last_write = self._last
+            elapsed = max(now - last_time, 1e-6)
+            # descendants that exited since the last sample take their counters with them, never report negative rates
+            sample["cpu_percent"] = max(0.0, (cpu - last_cpu) / elapsed * 100)
+            sample["read_rate"] = max(0.0, (read - last_read) / elapsed)
+            sample["write_rate"] = max(0.0, (write - last_write) / elapsed)
+        self._last = (now, cpu, read, write)
+        return sample
+
+
+class ResourceMonitor(QtCore.QThread):
+    """Sample a process tree every `interval` seconds on a background thread and emit every sample on
+    `sample_signal` (delivered on the GUI thread).
+
+    `history` keeps the last `history_size` samples for the sparkline. Alerts added with `add_alert` call back when a
+    metric stays above a threshold.
+    """
+    sample_signal = QtCore.pyqtSignal(dict)
+
+    def __init__(self, interval: float = 1.0, history_size: int = 20, parent=None):
+        super().__init__(parent)
+        self.interval = interval
+        self.pid = None
+        self.history = deque(maxlen=history_size)
+        self.alerts = []
+        self._stop = threading.Event()
+        self.sample_signal.connect(self._handle_sample)
+
+    def watch(self, pid: int):
+        """Start sampling `pid` and its descendants."""
+        self.stop()
+        self.pid = pid
+        self.history.clear()
+        self._stop.clear()
+        self.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.isRunning():
+            self.wait()
+
+    def run(self):
+        sampler = ProcessTreeSampler(self.pid)
+        while not self._stop.is_set():
+            sample = sampler.sample()
+            if sample is None:
+                break
+            self.sample_signal.emit(sample)
+            self._stop.wait(self.interval)
+
+    def add_alert(self, metric: str, threshold: float, callback, samples: int = 1):
+        """Call `callback(metric, value, sample)` when `metric` ("cpu_percent", "rss", "read_rate", "write_rate" or
+        "processes") has been above `threshold` for `samples` samples in a row. It is called again only after the
+        metric went back below the threshold."""
+        self.alerts.append({"metric": metric, "threshold": threshold, "callback": callback, "samples": samples,
+                            "above": 0, "fired": False})
+
+    def _handle_sample(self, sample):
+        self.history.append(sample)
+        for alert in self.alerts:
+            value = sample.get(alert["metric"])
+            if value is not None and value > alert["threshold"]:
+                alert["above"] += 1
+                if alert["above"] >= alert["samples"] and not alert["fired"]:
+                    alert["fired"] = True
+                    alert["callback"](alert["metric"], value, sample)
+            else:
+                alert["above"] = 0
+                alert["fired"] = False
+
+    def summary(self) -> str:
+        """e.g. `CPU 12% ▁▂▅▇ RSS 45.2MB R 1.2MB/s W 0B/s`, empty before the first sample."""
+        if not self.history:
+            return ""
+        sample = self.history[-1]
+        cpu = [s["cpu_percent"] for s in self.history]
+        # scaled to one full core unless it uses more
+        spark = sparkline(cpu, maximum=max([100.0] + cpu))
+        procs = f" ({sample['processes']} procs)" if sample["processes"] > 1 else ""
+        return (f"CPU {sample['cpu_percent']:.0f}% {spark} RSS {format_bytes(sample['rss'])}{procs} "
+                f"R {format_bytes(sample['read_rate'])}/s W {format_bytes(sample['write_rate'])}/s")
@@ -0,0 +1,93 @@
+"""Keep a single running instance of a program and forward the arguments of later launches to it.
+
+The first instance listens on a local socket (a Unix domain socket, or a named pipe on Windows) named after the
+program and the user. A later launch connects to it before creating its QApplication, sends its argv and working
+directory as one JSON line, and exits, which takes milliseconds instead of a full Qt startup.
+"""
+import getpass
+import hashlib
+import json
+import os
+
+from PyQt5 import QtCore, QtNetwork
+
+
+def server_name(key: str) -> str:
+    """Name of the local socket of `key`, per user so that users on the same machine do not share an instance."""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = str(os.getuid()) if hasattr(os, "getuid") else ""
+    digest = hashlib.sha1(f"{key}\0{user}".encode("utf-8")).hexdigest()[:16]
+    return f"programmify-{digest}"
+
+
+def forward_args(name: str, argv: list, cwd: str = None, timeout: int = 500) -> bool:
+    """Send `argv` and `cwd` to the instance listening on `name`, False if there is none.
+
+    `timeout` (ms) bounds each of connecting and writing, a running instance answers within a few ms.
+    """
+    socket = QtNetwork.QLocalSocket()
+    socket.connectToServer(name)
+    if not socket.waitForConnected(timeout):
+        return False
+    message = json.dumps({"argv": list(argv), "cwd": cwd or os.getcwd()}) + "\n"
+    socket.write(message.encode("utf-8"))
+    sent = socket.waitForBytesWritten(timeout) or socket.bytesToWrite() == 0
+    socket.disconnectFromServer()
+    if socket.state() != QtNetwork.QLocalSocket.UnconnectedState:
+        socket.waitForDisconnected(timeout)
+    return sent
+
+
+class SingleInstanceServer(QtCore.QObject):
+    """Listen on `name` and emit `message_signal(argv, cwd)` for every later launch that forwarded its arguments."""
+    message_signal = QtCore.pyqtSignal(list, str)
+
+    def __init__(self, name: str, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.server = QtNetwork.QLocalServer(self)
+        self.server.setSocketOptions(QtNetwork.QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._accept)
+        self._buffers = {}
+
+    def listen(self) -> bool:
+        """Start listening, False if another instance already is."""
+        if self.server.listen(self.name):
+            return True
+        if self.server.serverError() != QtNetwork.QAbstractSocket.AddressInUseError:
+            return False
+        # either a live instance, or the socket file left behind by one that crashed
+        if forward_args(self.name, [], timeout=100):
+            return False
+        QtNetwork.QLocalServer.removeServer(self.name)
+        return self.server.listen(self.name)
+
+    def close(self):
+        self.server.close()
+
+    def _accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda s=socket: self._read(s))
+            socket.disconnected.connect(lambda s=socket: self._finish(s))
+
+    def _read(self, socket):
+        if socket in self._buffers:
+            self._buffers[socket] += bytes(socket.readAll())
+
+    def _finish(self, socket):
+        self._read(socket)
+        data = self._buffers.pop(socket, b"")
+        socket.deleteLater()
+        for line in data.splitlines():
+            try:
+                message = json.loads(line.decode("utf-8"))
+            except ValueError:
+                continue
+            argv = message.get("argv")
+            # an empty argv is the probe of `listen` checking whether this instance is alive
+            if argv:
+                self.message_signal.emit(argv, message.get("cwd") or "")
@@ -1,76 +1,179 @@
 import os
 import signal
 import subprocess
-import threading
 import time
+from collections import deque
 from pathlib import Path
 
 from PyQt5 import QtWidgets, QtGui, QtCore
 
+from programmify.log_sink import LogSink
+from programmify.log_view import LogView
+from programmify.output_rules import RuleSet
+from programmify.pipe_pump import PipePump, OutputLine, STDOUT, STDERR, resolve_encoding
 from programmify.programmify import ProgrammifyWidget
+from programmify.resource_monitor import ResourceMonitor
+
+# keep the child from opening a console window on Windows
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
 
 
 class ProcessThread(QtCore.QThread):
     output_signal = QtCore.pyqtSignal(str)
+    output_batch_signal = QtCore.pyqtSignal(list)
     error_signal = QtCore.pyqtSignal(str)
     pid_signal = QtCore.pyqtSignal(int)
     exit_signal = QtCore.pyqtSignal(int)
 
-    def __init__(self, cmd, cwd=None, parent=None):
+    def __init__(self, cmd, cwd=None, parent=None, flush_interval: int = 0, max_batch: int = 500,
+                 encoding: str = "utf-8", errors: str = "replace", log_sink: LogSink = None, rules: RuleSet = None):
+        """Run `cmd` and emit its stdout and stderr live, in the order they were read.
+
+        If `flush_interval` (ms) is 0 every line is emitted on `output_signal` or `error_signal`, otherwise lines are
+        collected and emitted as lists of `OutputLine` on `output_batch_signal` every `flush_interval` ms or whenever
+        `max_batch` lines are pending. The output is decoded with `encoding` and `errors` (see `PipePump`).
+
+        Every line is also queued to `log_sink` if given, which is closed once the process exited, and then passed
+        through `rules` (see programmify.output_rules) on this thread before it is emitted.
+        """
         super(ProcessThread, self).__init__(parent)
         self.cmd = cmd
         self.cwd = cwd
+        self.encoding = resolve_encoding(encoding, errors)
+        self.errors = errors
+        self.log_sink = log_sink
+        self.rules = rules
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def emit_output(self, line: OutputLine):
+        if self.log_sink is not None:
+            self.log_sink.write(line)
+        if self.rules is not None:
+            line = self.rules.apply(line)
+            if line is None:
+                return
+        if not self.flush_interval:
+            if line.stream == STDERR:
+                self.error_signal.emit(line.text)
+            else:
+                self.output_signal.emit(line.text)
+            return
+        self._pending.append(line)
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self.output_batch_signal.emit(batch)
+
+    def poll_timeout(self):
+        # only wake up early if there is something waiting to be flushed
+        if not self._pending:
+            return None
+        return max(0.0, self._last_flush + self.flush_interval / 1000 - time.monotonic())
 
     def run(self):
         self.process = subprocess.Popen(self.cmd, cwd=self.cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                        creationflags=subprocess.CREATE_NO_WINDOW)
+                                        creationflags=CREATE_NO_WINDOW)
         self.pid_signal.emit(self.process.pid)
-        exit_code = None
-        while True:
-            output = self.process.stdout.readline()
-            exit_code = self.process.poll()
-            if (not output) and (exit_code is not None):
-                break
-            if output:
-                self.output_signal.emit(output.strip().decode())
-        # Handle stderr in a similar fashion if needed
-        # if it existed with an error code
-        if self.process.poll() != 0:
-            error = self.process.stderr.read()
-            self.error_signal.emit(error.strip().decode())
+        pump = PipePump(encoding=self.encoding, errors=self.errors)
+        pump.register(None, self.process)
+        try:
+            while pump.active:
+                for _, line in pump.poll(self.poll_timeout()):
+                    self.emit_output(line)
+                if self._pending and time.monotonic() - self._last_flush >= self.flush_interval / 1000:
+                    self.flush()
+        finally:
+            pump.close()
+        self.flush()
+        exit_code = self.process.wait()
+        if self.log_sink is not None:
+            self.log_sink.close()
         self.exit_signal.emit(exit_code)
 
 
 class SubprocessWidget(ProgrammifyWidget):
-    def __init__(self, cmd, cwd=Path.cwd(), stay_open=False, name: str = None, icon: str = None, **kw):
+    def __init__(self, cmd, cwd=Path.cwd(), stay_open=False, name: str = None, icon: str = None,
+                 flush_interval: int = 30, max_batch: int = 500, scrollback_lines: int = 10000,
+                 scrollback_bytes: int = None, encoding: str = "utf-8", errors: str = "replace", log_file: str = None,
+                 log_max_bytes: int = 64 * 2 ** 20, log_backups: int = 5, monitor_interval: float = 1.0, rules=None,
+                 **kw):
+        """
+        flush_interval: milliseconds between output updates, set to 0 to update the display on every line
+        max_batch: maximum number of lines collected before the display is updated early
+        scrollback_lines: number of output lines to keep in the display, None for unlimited
+        scrollback_bytes: approximate number of bytes of output to keep in the display, None for unlimited
+        encoding: encoding of the output of the process, e.g. "cp1252" or "locale"
+        errors: what to do with bytes that are not valid in `encoding`: "replace", "ignore", "backslashreplace", ...
+        log_file: also write the output, timestamped, to this file (rotated at `log_max_bytes`, keeping `log_backups`
+            old files) and show a search bar (Ctrl+F) that searches it
+        monitor_interval: seconds between samples of the CPU, memory and I/O of the process and its children shown in
+            the banner and tray tooltip, None to turn it off. Alerts can be added with `resource_monitor.add_alert`
+        rules: a RuleSet or a list of rules (dicts) to highlight, hide, count or extract numbers from output lines on
+            the reader thread, see programmify.output_rules. Counts and numbers are shown in a panel below the banner
+
+        The process starts with the widget, also with `tray_only` when the window has not been opened yet. While there
+        is no UI the last `scrollback_lines` lines are kept and shown once it is built.
+        """
         if isinstance(cmd, str):
             cmd = [v.strip() for v in cmd.split(" ") if v.strip()]
         self.cmd = cmd
         self.cwd = cwd
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.scrollback_lines = scrollback_lines
+        self.scrollback_bytes = scrollback_bytes
+        self.encoding = resolve_encoding(encoding, errors)
+        self.errors = errors
+        self.log_file = log_file
+        self.log_max_bytes = log_max_bytes
+        self.log_backups = log_backups
+        # persist the output, the search bar of the UI searches it
+        self.log_sink = LogSink(log_file, max_bytes=log_max_bytes, backups=log_backups) if log_file else None
+        self.monitor_interval = monitor_interval
+        self.resource_monitor = None
+        self.rules = rules if rules is None or isinstance(rules, RuleSet) else RuleSet(rules)
         self.pid = None
         self.exit_code = None
         self.stay_open = stay_open
+        self.process_thread = None
+        # output received while there is no UI to show it (tray_only)
+        self._held_output = deque(maxlen=scrollback_lines)
         super().__init__(name, icon, **kw)
+        self.start_process_thread()
 
     def setupUI(self):
         # Create a layout
         layout = QtWidgets.QVBoxLayout(self)
 
         # Dark mode colors
-        palette = QtGui.QPalette()
-        palette.setColor(QtGui.QPalette.Window, QtGui.QColor(53, 53, 53))
-        palette.setColor(QtGui.QPalette.WindowText, QtCore.Qt.white)
-        self.setPalette(palette)
+        self.set_dark_palette()
 
         # add a banner with the PID and process name
         self.banner = QtWidgets.QLabel(self)
 
         # add space between the banner and the output display
         layout.addWidget(self.banner)
+        self.add_metrics_panel(layout)
 
-        # Create a QTextEdit widget for displaying output and error
-        self.output_display = QtWidgets.QTextEdit(self)
+        # Create a LogView widget for displaying output and error
+        self.output_display = LogView(self, max_lines=self.scrollback_lines, max_bytes=self.scrollback_bytes)
         self.output_display.setStyleSheet("background-color: #2b2b2b; color: white;")
+
+        # search the persisted output
+        if self.log_sink is not None:
+            from programmify.log_search import LogSearchBar
+            self.search_bar = LogSearchBar(self.log_sink, self.output_display, self)
+            layout.addWidget(self.search_bar)
+            # owned by the search bar so that it goes away with the rest of the UI
+            QtWidgets.QShortcut(QtGui.QKeySequence.Find, self.search_bar, self.search_bar.focus)
+
         layout.addWidget(self.output_display)
 
         # Create a stop button
@@ -82,34 +185,163 @@ class SubprocessWidget(ProgrammifyWidget):
         # Set the layout on the QWidget
         self.setLayout(layout)
 
-        # Instantiate and start ProcessThread
-        self.process_thread = ProcessThread(self.cmd, self.cwd)
-        self.process_thread.output_signal.connect(self.handle_stdout)
-        self.process_thread.error_signal.connect(self.handle_stderr)
-        self.process_thread.pid_signal.connect(self.handle_pid)
-        self.process_thread.exit_signal.connect(self.handle_exit)
+    def start_process_thread(self):
+        """Start the process, independent of the UI which tray_only and teardown_on_close build and delete."""
+        # sample the resource usage of the process once it started
+        if self.monitor_interval:
+            self.resource_monitor = ResourceMonitor(self.monitor_interval, parent=self)
+            self.resource_monitor.sample_signal.connect(self.handle_resources)
+            QtWidgets.QApplication.instance().aboutToQuit.connect(self.resource_monitor.stop)
+        self.process_thread = self.create_process_thread()
+        self.route_output(self.ui_ready)
         self.process_thread.start()
 
+    def create_process_thread(self):
+        # Instantiate ProcessThread, the output signals are connected by route_output
+        process_thread = ProcessThread(self.cmd, self.cwd, flush_interval=self.flush_interval,
+                                       max_batch=self.max_batch, encoding=self.encoding, errors=self.errors,
+                                       log_sink=self.log_sink, rules=self.rules)
+        process_thread.pid_signal.connect(self.handle_pid)
+        process_thread.exit_signal.connect(self.handle_exit)
+        return process_thread
+
+    def output_routes(self):
+        """(signal, slot that shows it, slot that holds it while there is no UI) for every output signal."""
+        return [(self.process_thread.output_signal, self.handle_stdout, self._hold_stdout),
+                (self.process_thread.error_signal, self.handle_stderr, self._hold_stderr),
+                (self.process_thread.output_batch_signal, self.handle_output_batch, self._hold_output_batch)]
+
+    def route_output(self, display: bool):
+        """Connect the output of the process to the display, or to a buffer of the last lines while there is none."""
+        if display:
+            held = self.take_held_output()
+            if held:
+                self.show_held_output(held)
+        for signal, show, hold in self.output_routes():
+            try:
+                signal.disconnect(hold if display else show)
+            except TypeError:
+                # was not connected yet
+                pass
+            signal.connect(show if display else hold)
+
+    def _hold_stdout(self, text):
+        self._hold_output_batch([OutputLine(STDOUT, time.monotonic(), text)])
+
+    def _hold_stderr(self, text):
+        self._hold_output_batch([OutputLine(STDERR, time.monotonic(), text)])
+
+    def _hold_output_batch(self, lines):
+        self._held_output.extend(lines)
+
+    def take_held_output(self) -> list:
+        held = list(self._held_output)
+        self._held_output.clear()
+        return held
+
+    def show_held_output(self, held):
+        self.handle_output_batch(held)
+
+    def ensure_ui(self):
+        if self.ui_ready:
+            return
+        super().ensure_ui()
+        # the process may have started, written output or exited while there was no UI
+        self.update_status()
+        if self.process_thread is not None:
+            self.route_output(True)
+
+    def teardownUI(self):
+        if self.process_thread is not None:
+            self.route_output(False)
+        search_bar = getattr(self, "search_bar", None)
+        if search_bar is not None:
+            search_bar.stop()
+            self.search_bar = None
+        super().teardownUI()
+
+    def add_metrics_panel(self, layout):
+        # live values of the count and extract rules
+        if self.rules is not None and any(rule.action in ("count", "extract") for rule in self.rules.rules):
+            from programmify.metrics_panel import MetricsPanel
+            self.metrics_panel = MetricsPanel(self.rules, self)
+            layout.addWidget(self.metrics_panel)
+
+    def set_dark_palette(self):
+        palette = QtGui.QPalette()
+        palette.setColor(QtGui.QPalette.Window, QtGui.QColor(53, 53, 53))
+        palette.setColor(QtGui.QPalette.WindowText, QtCore.Qt.white)
+        self.setPalette(palette)
+
     def handle_stdout(self, data):
-        # Add data to the QTextEdit widget
+        # Add data to the LogView widget
         self.output_display.append(data)
 
+    def handle_output_batch(self, lines):
+        # Split the batch into runs of consecutive lines from the same stream, keeping their order
+        run = []
+        for line in lines:
+            if run and line.stream != run[-1].stream:
+                self._handle_run(run)
+                run = []
+            run.append(line)
+        if run:
+            self._handle_run(run)
+
+    def _handle_run(self, run):
+        if run[0].stream == STDERR:
+            self.handle_stderr("\n".join(line.text for line in run))
+        else:
+            self.handle_stdout_batch([line.text for line in run])
+
+    def handle_stdout_batch(self, lines):
+        # Add all lines to the LogView widget in a single edit
+        self.output_display.append_lines(lines)
+
     def handle_stderr(self, error):
-        # Add error to the QTextEdit widget
+        # Add error to the LogView widget
         self.output_display.append(error)
 
     def handle_pid(self, pid):
         self.pid = pid
-        self.stop_button.setDisabled(False)
-        self.banner.setText(f'{self.name} (PID#{self.pid})')
+        if self.tray_status:
+            self.set_tray_state("running")
+        if self.resource_monitor is not None:
+            self.resource_monitor.watch(pid)
+        self.update_status()
+
+    def handle_resources(self, sample):
+        if self.exit_code is not None:
+            return
+        status = f'{self.name} (PID#{self.pid}) {self.resource_monitor.summary()}'
+        if self.ui_ready:
+            self.banner.setText(status)
+        if self.trayIcon:
+            self.trayIcon.setToolTip(status)
 
     def handle_exit(self, exit_code):
         self.exit_code = exit_code
-        self.stop_button.setText("Process Error" if exit_code else "Process finished")
-        self.stop_button.setDisabled(True)
+        if self.resource_monitor is not None:
+            self.resource_monitor.stop()
+            if self.trayIcon:
+                self.trayIcon.setToolTip(self.name)
+        if self.tray_status:
+            self.set_tray_state("error" if exit_code else "done")
+        self.update_status()
         if not self.stay_open and not exit_code:
             self.close()
 
+    def update_status(self):
+        """Show the state of the process on the banner and stop button, if the UI is built."""
+        if not self.ui_ready or self.pid is None:
+            return
+        self.banner.setText(f'{self.name} (PID#{self.pid})')
+        if self.exit_code is None:
+            self.stop_button.setDisabled(False)
+        else:
+            self.stop_button.setText("Process Error" if self.exit_code else "Process finished")
+            self.stop_button.setDisabled(True)
+
     def interrupt_process(self):
         # send sigint to process using the os module
         os.kill(self.pid, signal.SIGINT)
@@ -136,29 +368,26 @@ class SubprocessWidget(ProgrammifyWidget):
     def start_process(self):
         print(f"Starting process: {self.cmd}")
         self.process = subprocess.Popen(self.cmd, cwd=self.cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                        creationflags=subprocess.CREATE_NO_WINDOW)
+                                        creationflags=CREATE_NO_WINDOW)
         self.banner.setText(f'{self.name} (PID#{self.process.pid})')
-        while True:
-            output = self.process.stdout.readline()
-            if (not output) and (self.process.poll() is not None):
-                break
-            if output:
-                self.handle_stdout(output.strip().decode())
+        pump = PipePump(encoding=self.encoding, errors=self.errors)
+        pump.register(None, self.process)
+        try:
+            while pump.active:
+                for _, line in pump.poll():
+                    if line.stream == STDERR:
+                        self.handle_stderr(line.text)
+                    else:
+                        self.handle_stdout(line.text)
+        finally:
+            pump.close()
+        self.process.wait()
         self.stop_button.setText("Process finished")
         self.stop_button.setDisabled(True)
-        while True:
-            error = self.process.stderr.readline()
-            if (not error):
-                break
-            if error:
-                self.handle_stderr(error.strip().decode())
 
     @classmethod
     def run(cls, cmd, **kw):
-        app = QtWidgets.QApplication([])
-        widget = cls(cmd, **kw)
-        widget.show()
-        app.exec_()
+        return cls._run(cmd, **kw)
 
 
 def sample(start, stop, interval=1):
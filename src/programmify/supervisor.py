@@ -0,0 +1,272 @@
+import subprocess
+import time
+from collections import deque
+from pathlib import Path
+
+from PyQt5 import QtWidgets, QtCore
+
+from programmify.log_view import LogView
+from programmify.pipe_pump import PipePump, OutputLine, STDERR
+from programmify.subprocess_program import ProcessThread, SubprocessWidget, CREATE_NO_WINDOW
+
+
+class SupervisorThread(ProcessThread):
+    """Run several commands and read all of their output on this one thread.
+
+    Output is always batched and emitted on `output_batch_signal` as a list of (index, OutputLine), where index is the
+    position of the command in `cmds`, so the number of signals stays the same however many children run. On posix so
+    does the number of threads, on Windows PipePump adds two reader threads per child (see PipePump).
+    """
+    child_pid_signal = QtCore.pyqtSignal(int, int)
+    child_exit_signal = QtCore.pyqtSignal(int, int)
+
+    def __init__(self, cmds, cwd=None, parent=None, flush_interval: int = 30, max_batch: int = 500,
+                 encoding: str = "utf-8", errors: str = "replace", rules=None):
+        super().__init__(cmds, cwd, parent, flush_interval=flush_interval, max_batch=max_batch, encoding=encoding,
+                         errors=errors, rules=rules)
+        self.cmds = cmds
+        self.processes = []
+
+    def emit_output(self, line):
+        if self.rules is not None:
+            index, output = line
+            output = self.rules.apply(output)
+            if output is None:
+                return
+            line = (index, output)
+        self._pending.append(line)
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+
+    def run(self):
+        pump = PipePump(encoding=self.encoding, errors=self.errors)
+        exiting = set()
+        for index, cmd in enumerate(self.cmds):
+            try:
+                process = subprocess.Popen(cmd, cwd=self.cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                           creationflags=CREATE_NO_WINDOW)
+            except OSError as e:
+                self.processes.append(None)
+                self.emit_output((index, OutputLine(STDERR, time.monotonic(), f"Failed to start {cmd}: {e}")))
+                self.flush()
+                self.child_exit_signal.emit(index, -1)
+                continue
+            self.processes.append(process)
+            pump.register(index, process)
+            self.child_pid_signal.emit(index, process.pid)
+        try:
+            while pump.active or exiting:
+                timeout = self.poll_timeout()
+                if exiting:
+                    # children that closed their pipes are checked for their exit code every 100ms
+                    timeout = 0.1 if timeout is None else min(timeout, 0.1)
+                if pump.active:
+                    for line in pump.poll(timeout):
+                        self.emit_output(line)
+                else:
+                    time.sleep(timeout)
+                exiting.update(pump.pop_finished())
+                if self._pending and time.monotonic() - self._last_flush >= self.flush_interval / 1000:
+                    self.flush()
+                for index in sorted(exiting):
+                    exit_code = self.processes[index].poll()
+                    if exit_code is not None:
+                        exiting.discard(index)
+                        self.flush()
+                        self.child_exit_signal.emit(index, exit_code)
+        finally:
+            pump.close()
+        self.flush()
+
+
+class ProcessPane(QtWidgets.QWidget):
+    """Output, status and stop button for one child of a SupervisorWidget."""
+
+    def __init__(self, name: str, cmd, parent=None, scrollback_lines: int = 10000, scrollback_bytes: int = None):
+        super().__init__(parent)
+        self.name = name
+        self.cmd = cmd
+        self.pid = None
+        self.exit_code = None
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # add a banner with the PID and status
+        self.banner = QtWidgets.QLabel(f'{self.name} (starting)', self)
+        layout.addWidget(self.banner)
+
+        # Create a LogView widget for displaying output and error
+        self.output_display = LogView(self, max_lines=scrollback_lines, max_bytes=scrollback_bytes)
+        self.output_display.setStyleSheet("background-color: #2b2b2b; color: white;")
+        layout.addWidget(self.output_display)
+
+        # Create a stop button
+        self.stop_button = QtWidgets.QPushButton('Stop (SIGINT)', self)
+        self.stop_button.setDisabled(True)
+        self.stop_button.clicked.connect(self.interrupt_process)
+        layout.addWidget(self.stop_button)
+
+    # the output handling and the SIGINT => SIGTERM => SIGKILL escalation are the same as for a single process
+    handle_stdout = SubprocessWidget.handle_stdout
+    handle_output_batch = SubprocessWidget.handle_output_batch
+    _handle_run = SubprocessWidget._handle_run
+    handle_stdout_batch = SubprocessWidget.handle_stdout_batch
+    handle_stderr = SubprocessWidget.handle_stderr
+    interrupt_process = SubprocessWidget.interrupt_process
+    terminate_process = SubprocessWidget.terminate_process
+    kill_process = SubprocessWidget.kill_process
+
+    @property
+    def running(self) -> bool:
+        return self.pid is not None and self.exit_code is None
+
+    @property
+    def status(self) -> str:
+        if self.exit_code is not None:
+            return f"exited {self.exit_code}"
+        return "running" if self.pid is not None else "starting"
+
+    def handle_pid(self, pid):
+        self.pid = pid
+        self.stop_button.setDisabled(False)
+        self.banner.setText(f'{self.name} (PID#{self.pid}) {self.status}')
+
+    def handle_exit(self, exit_code):
+        self.exit_code = exit_code
+        self.stop_button.setText("Process Error" if exit_code else "Process finished")
+        self.stop_button.setDisabled(True)
+        self.banner.setText(f'{self.name} (PID#{self.pid}) {self.status}')
+
+
+class SupervisorWidget(SubprocessWidget):
+    """Run many commands under one window and one tray icon, with a tab per process.
+
+    All children are read by a single SupervisorThread instead of one ProcessThread each.
+
+    cmds: list of commands, or a dict of {tab name: command}
+
+    The options of SubprocessWidget that apply to a single process (`log_file` and `monitor_interval`) are not
+    supported.
+    """
+    unsupported = ("log_file", "log_max_bytes", "log_backups", "monitor_interval")
+
+    def __init__(self, cmds, cwd=Path.cwd(), stay_open=False, name: str = None, icon: str = None, **kw):
+        for option in self.unsupported:
+            if option in kw:
+                raise TypeError(f"{type(self).__name__} does not support {option!r}")
+        items = cmds.items() if isinstance(cmds, dict) else [(None, cmd) for cmd in cmds]
+        self.cmd_names = []
+        cmds = []
+        for cmd_name, cmd in items:
+            if isinstance(cmd, str):
+                cmd = [v.strip() for v in cmd.split(" ") if v.strip()]
+            if cmd_name is None:
+                # name the tab after the script if the command is `python script.py ...`
+                exe = Path(cmd[0]).stem
+                cmd_name = Path(cmd[1]).stem if exe.startswith("python") and len(cmd) > 1 else exe
+            self.cmd_names.append(cmd_name)
+            cmds.append(cmd)
+        self.panes = []
+        # the state of every child, kept apart from the panes which tray_only and teardown_on_close may delete
+        self.child_pids = [None] * len(cmds)
+        self.child_exit_codes = [None] * len(cmds)
+        # index => output received while there is no UI
+        self._held_by_index = {}
+        super().__init__(cmds, cwd, stay_open, name, icon, monitor_interval=None, **kw)
+
+    def setupUI(self):
+        # Create a layout
+        layout = QtWidgets.QVBoxLayout(self)
+
+        # Dark mode colors
+        self.set_dark_palette()
+
+        # add a banner with the number of running processes
+        self.banner = QtWidgets.QLabel(self)
+        layout.addWidget(self.banner)
+        self.add_metrics_panel(layout)
+
+        # add a tab for each process
+        self.tabs = QtWidgets.QTabWidget(self)
+        self.panes = []
+        for index, (cmd_name, cmd) in enumerate(zip(self.cmd_names, self.cmd)):
+            pane = ProcessPane(cmd_name, cmd, self.tabs, scrollback_lines=self.scrollback_lines,
+                               scrollback_bytes=self.scrollback_bytes)
+            # the child may have started or exited before the UI was built
+            if self.child_pids[index] is not None:
+                pane.handle_pid(self.child_pids[index])
+            if self.child_exit_codes[index] is not None:
+                pane.handle_exit(self.child_exit_codes[index])
+            self.panes.append(pane)
+            self.tabs.addTab(pane, cmd_name)
+        layout.addWidget(self.tabs)
+
+        # Set the layout on the QWidget
+        self.setLayout(layout)
+
+    def create_process_thread(self):
+        # Instantiate SupervisorThread, its output is connected by route_output
+        process_thread = SupervisorThread(self.cmd, self.cwd, flush_interval=self.flush_interval,
+                                          max_batch=self.max_batch, encoding=self.encoding, errors=self.errors,
+                                          rules=self.rules)
+        process_thread.child_pid_signal.connect(self.handle_child_pid)
+        process_thread.child_exit_signal.connect(self.handle_child_exit)
+        return process_thread
+
+    def output_routes(self):
+        return [(self.process_thread.output_batch_signal, self.handle_supervisor_batch, self._hold_output_batch)]
+
+    def _hold_output_batch(self, lines):
+        # the last scrollback_lines of every child, a noisy child does not push out the output of the others
+        for index, line in lines:
+            held = self._held_by_index.get(index)
+            if held is None:
+                held = self._held_by_index[index] = deque(maxlen=self.scrollback_lines)
+            held.append(line)
+
+    def take_held_output(self) -> list:
+        held = [(index, line) for index, lines in self._held_by_index.items() for line in lines]
+        self._held_by_index = {}
+        return held
+
+    def show_held_output(self, held):
+        self.handle_supervisor_batch(held)
+
+    def handle_supervisor_batch(self, lines):
+        # group the lines by process, keeping their order within each process
+        by_index = {}
+        for index, line in lines:
+            by_index.setdefault(index, []).append(line)
+        for index, process_lines in by_index.items():
+            self.panes[index].handle_output_batch(process_lines)
+
+    def handle_child_pid(self, index, pid):
+        self.child_pids[index] = pid
+        if self.ui_ready:
+            self.panes[index].handle_pid(pid)
+        self.update_status()
+
+    def handle_child_exit(self, index, exit_code):
+        self.child_exit_codes[index] = exit_code
+        if self.ui_ready:
+            self.panes[index].handle_exit(exit_code)
+        self.update_status()
+        if not self.stay_open and all(code == 0 for code in self.child_exit_codes):
+            self.close()
+
+    def update_status(self):
+        running = sum(pid is not None and code is None for pid, code in zip(self.child_pids, self.child_exit_codes))
+        failed = sum(bool(code) for code in self.child_exit_codes)
+        status = f"{running}/{len(self.cmd)} running"
+        if failed:
+            status += f", {failed} failed"
+        if self.ui_ready:
+            for index, pane in enumerate(self.panes):
+                self.tabs.setTabText(index, f"{pane.name} [{pane.status}]")
+            self.banner.setText(f"{self.name} ({status})")
+        if self.trayIcon:
+            self.trayIcon.setToolTip(f"{self.name} ({status})")
+        if self.tray_status:
+            # the badge counts the running processes
+            self.set_tray_state("error" if failed else "running" if running else "done", badge=running or None)
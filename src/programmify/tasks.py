@@ -0,0 +1,234 @@
+"""Run blocking or CPU-heavy work off the GUI thread and get the outcome back on it through Qt signals.
+
+Tasks run on two pools shared by the whole app: threads for blocking I/O and work that releases the GIL, processes for
+pure Python CPU work (the function and its arguments must be picklable, i.e. defined at module level). Every task gets
+a `TaskHandle` whose signals are delivered on the thread that submitted it.
+
+The number of tasks waiting or running is bounded by `max_pending`: submitting more raises `TaskQueueFull` right away
+rather than letting a burst of work pile up in memory and delay everything after it.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, CancelledError
+
+from PyQt5 import QtCore
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+class TaskQueueFull(RuntimeError):
+    """Raised by `submit` when `max_pending` tasks are already waiting or running."""
+
+
+class TaskCancelled(Exception):
+    """Raised by `TaskContext.check` inside a thread task that was cancelled while running."""
+
+
+def _timed_call(fn, args, kwargs):
+    # runs in the worker, the start time tells how long the task waited in the queue
+    start = time.time()
+    result = fn(*args, **kwargs)
+    return result, start, time.time()
+
+
+class TaskContext:
+    """Passed to thread tasks submitted with `with_context=True` as the `task` keyword argument."""
+
+    def __init__(self, handle, progress_interval: float):
+        self._handle = handle
+        self._progress_interval = progress_interval
+        self._last_progress = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._handle.cancel_requested
+
+    def check(self):
+        """Raise TaskCancelled if the task was cancelled, call it regularly in long loops."""
+        if self._handle.cancel_requested:
+            raise TaskCancelled()
+
+    def progress(self, value, force: bool = False):
+        """Emit `value` on `TaskHandle.progress_signal`, at most once every `progress_interval` seconds unless `force`."""
+        now = time.monotonic()
+        if force or now - self._last_progress >= self._progress_interval:
+            self._last_progress = now
+            self._handle.progress_signal.emit(value)
+
+
+class TaskHandle(QtCore.QObject):
+    """A submitted task. Exactly one of `result_signal`, `error_signal` and `cancelled_signal` is emitted, followed by
+    `finished_signal`."""
+    progress_signal = QtCore.pyqtSignal(object)
+    result_signal = QtCore.pyqtSignal(object)
+    error_signal = QtCore.pyqtSignal(object)
+    cancelled_signal = QtCore.pyqtSignal()
+    finished_signal = QtCore.pyqtSignal()
+    # emitted by the worker, delivered on the thread of the handle which then emits the signals above
+    _done_signal = QtCore.pyqtSignal()
+
+    def __init__(self, name: str, kind: str, parent=None):
+        super().__init__(parent)
+        self.name = name
+        self.kind = kind
+        self.future = None
+        self.cancel_requested = False
+        # "completed", "failed" or "cancelled" once the task finished
+        self.outcome = None
+        self._on_delivered = None
+        # always queued: a task that finished before add_done_callback reports from within submit
+        self._done_signal.connect(self._deliver, QtCore.Qt.QueuedConnection)
+        self.submitted = time.time()
+        # wait: seconds in the queue, run: seconds running, both None until the task finished
+        self.wait = None
+        self.run = None
+        self.result = None
+        self.error = None
+
+    def cancel(self) -> bool:
+        """Cancel the task. A task that has not started yet never runs. A running thread task with a context can stop at
+        its next `check`, any other running task runs to the end but its result is dropped."""
+        self.cancel_requested = True
+        return self.future.cancel() if self.future is not None else True
+
+    def done(self) -> bool:
+        return self.future is not None and self.future.done()
+
+    def running(self) -> bool:
+        return self.future is not None and self.future.running()
+
+    @QtCore.pyqtSlot()
+    def _deliver(self):
+        # on the submitting thread, after the code that submitted the task had the chance to connect its slots
+        if self.outcome == "completed":
+            self.result_signal.emit(self.result)
+        elif self.outcome == "failed":
+            self.error_signal.emit(self.error)
+        else:
+            self.cancelled_signal.emit()
+        self.finished_signal.emit()
+        if self._on_delivered is not None:
+            self._on_delivered(self)
+
+
+class TaskManager:
+    """The thread and process pools of an app, created on first use. See the module docstring."""
+    _shared = None
+
+    def __init__(self, threads: int = None, processes: int = None, max_pending: int = 256,
+                 progress_interval: float = 0.05, history_size: int = 1000):
+        self.threads = threads or min(32, (os.cpu_count() or 1) + 4)
+        self.processes = processes or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.progress_interval = progress_interval
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._active = set()
+        # finished handles whose signals are still queued, kept alive until they are delivered
+        self._delivering = set()
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "rejected": 0}
+        # (wait, run) seconds of the last finished tasks
+        self._history = deque(maxlen=history_size)
+
+    @classmethod
+    def shared(cls, **kwargs) -> "TaskManager":
+        """The TaskManager of the app, `kwargs` configure it when it is created by this call."""
+        if cls._shared is None:
+            cls._shared = cls(**kwargs)
+            app = QtCore.QCoreApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(cls._shared.shutdown)
+        return cls._shared
+
+    def _pool(self, kind: str):
+        pool = self._pools.get(kind)
+        if pool is None:
+            if kind == THREAD:
+                pool = ThreadPoolExecutor(self.threads, thread_name_prefix="programmify-task")
+            elif kind == PROCESS:
+                pool = ProcessPoolExecutor(self.processes)
+            else:
+                raise ValueError(f"Unknown task kind {kind!r}, use {THREAD!r} or {PROCESS!r}")
+            self._pools[kind] = pool
+        return pool
+
+    def submit(self, fn, *args, kind: str = THREAD, with_context: bool = False, parent=None, **kwargs) -> TaskHandle:
+        """Run `fn(*args, **kwargs)` on the `kind` pool and return its TaskHandle.
+
+        With `with_context` (thread tasks only) `fn` also gets a `task` keyword argument, a TaskContext to report
+        progress and check for cancellation. Raises TaskQueueFull if `max_pending` tasks are waiting or running.
+        """
+        if with_context and kind != THREAD:
+            raise ValueError("with_context is only supported for thread tasks")
+        with self._lock:
+            if len(self._active) >= self.max_pending:
+                self._counts["rejected"] += 1
+                raise TaskQueueFull(f"{len(self._active)} tasks are already pending (max_pending={self.max_pending})")
+            self._counts["submitted"] += 1
+        handle = TaskHandle(getattr(fn, "__qualname__", repr(fn)), kind, parent)
+        if with_context:
+            kwargs["task"] = TaskContext(handle, self.progress_interval)
+        with self._lock:
+            self._active.add(handle)
+        try:
+            handle.future = self._pool(kind).submit(_timed_call, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._active.discard(handle)
+            raise
+        handle._on_delivered = self._delivered
+        handle.future.add_done_callback(lambda future: self._finish(handle, future))
+        return handle
+
+    def _finish(self, handle: TaskHandle, future):
+        # called on a worker or pool management thread
+        outcome = "completed"
+        try:
+            result, start, end = future.result()
+            handle.wait, handle.run = max(0.0, start - handle.submitted), end - start
+            self._history.append((handle.wait, handle.run))
+            handle.result = result
+            if handle.cancel_requested:
+                outcome = "cancelled"
+        except (CancelledError, TaskCancelled):
+            outcome = "cancelled"
+        except BaseException as e:
+            handle.error = e
+            outcome = "cancelled" if handle.cancel_requested else "failed"
+        handle.outcome = outcome
+        with self._lock:
+            self._active.discard(handle)
+            self._delivering.add(handle)
+            self._counts[outcome] += 1
+        handle._done_signal.emit()
+
+    def _delivered(self, handle: TaskHandle):
+        with self._lock:
+            self._delivering.discard(handle)
+
+    def stats(self) -> dict:
+        """Counts of submitted, completed, failed, cancelled and rejected tasks, how many are queued and running now,
+        and the mean, 95th percentile and max of the wait and run time (seconds) of the last finished tasks."""
+        with self._lock:
+            active = list(self._active)
+            stats = dict(self._counts)
+        running = sum(handle.running() for handle in active)
+        stats.update(pending=len(active), running=running, queued=len(active) - running,
+                     max_pending=self.max_pending, threads=self.threads, processes=self.processes)
+        history = list(self._history)
+        for i, key in enumerate(("wait", "run")):
+            values = sorted(h[i] for h in history)
+            stats[key] = {"mean": sum(values) / len(values), "p95": values[int(len(values) * 0.95)],
+                          "max": values[-1]} if values else None
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        """Cancel the tasks that did not start and stop the pools."""
+        for handle in list(self._active):
+            handle.cancel()
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+        self._pools = {}
@@ -0,0 +1,127 @@
+"""Tray icons showing live state: a colored status dot, a progress ring and a numeric badge drawn over the base icon.
+
+Every combination is drawn once per icon size and kept in a bounded LRU, and progress is rounded to `progress_steps`,
+so a status that changes many times per second mostly costs a dict lookup.
+"""
+from collections import OrderedDict
+
+from PyQt5 import QtCore, QtGui
+
+# color of the status dot of every state, None draws no dot
+state_colors = {
+    None: None,
+    "idle": (150, 150, 150),
+    "running": (13, 188, 121),
+    "busy": (229, 229, 16),
+    "warning": (245, 160, 40),
+    "error": (241, 76, 76),
+    "done": (59, 142, 234),
+}
+progress_color = (59, 142, 234)
+badge_color = (220, 40, 40)
+
+# sizes drawn for every icon, the platform picks the one it shows in the tray
+default_sizes = (16, 20, 24, 32, 48, 64)
+
+
+def badge_text(badge) -> str:
+    """What a badge shows, numbers above 99 as 99+."""
+    if badge is None or badge == "":
+        return ""
+    if isinstance(badge, int):
+        return "99+" if badge > 99 else str(badge)
+    return str(badge)[:3]
+
+
+class TrayIconRenderer:
+    """Composite state, progress and badge onto `base` (a QIcon) and memoize the resulting QIcons."""
+
+    def __init__(self, base: QtGui.QIcon, sizes=default_sizes, cache_size: int = 128, progress_steps: int = 48):
+        self.base = base
+        self.sizes = tuple(sizes)
+        self.cache_size = cache_size
+        self.progress_steps = progress_steps
+        self._base_pixmaps = {}
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, state: str = None, progress: float = None, badge=None) -> tuple:
+        """The cache key of a state, with progress rounded to the resolution of the ring."""
+        if state not in state_colors:
+            raise ValueError(f"Unknown tray state {state!r}, use one of {[s for s in state_colors if s]}")
+        if progress is not None:
+            progress = round(min(1.0, max(0.0, progress)) * self.progress_steps)
+        return state, progress, badge_text(badge)
+
+    def icon(self, state: str = None, progress: float = None, badge=None) -> QtGui.QIcon:
+        key = self.key(state, progress, badge)
+        icon = self._cache.get(key)
+        if icon is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return icon
+        self.misses += 1
+        icon = self.base if key == (None, None, "") else self._render(*key)
+        self._cache[key] = icon
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return icon
+
+    def _base_pixmap(self, size: int) -> QtGui.QPixmap:
+        pixmap = self._base_pixmaps.get(size)
+        if pixmap is None:
+            pixmap = self.base.pixmap(size, size)
+            if pixmap.width() != size:
+                pixmap = pixmap.scaled(size, size, QtCore.Qt.KeepAspectRatio, QtCore.Qt.SmoothTransformation)
+            self._base_pixmaps[size] = pixmap
+        return pixmap
+
+    def _render(self, state, progress, badge) -> QtGui.QIcon:
+        icon = QtGui.QIcon()
+        for size in self.sizes:
+            icon.addPixmap(self._render_size(size, state, progress, badge))
+        return icon
+
+    def _render_size(self, size, state, progress, badge) -> QtGui.QPixmap:
+        pixmap = QtGui.QPixmap(size, size)
+        pixmap.fill(QtCore.Qt.transparent)
+        painter = QtGui.QPainter(pixmap)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        base = self._base_pixmap(size)
+        if progress is None:
+            painter.drawPixmap((size - base.width()) // 2, (size - base.height()) // 2, base)
+        else:
+            # shrink the icon to make room for the ring around it
+            ring = max(2.0, size / 8)
+            inner = int(size - 2 * ring)
+            painter.drawPixmap(QtCore.QRect(int(ring), int(ring), inner, inner), base)
+            rect = QtCore.QRectF(ring / 2, ring / 2, size - ring, size - ring)
+            painter.setPen(QtGui.QPen(QtGui.QColor(0, 0, 0, 80), ring))
+            painter.drawEllipse(rect)
+            pen = QtGui.QPen(QtGui.QColor(*progress_color), ring)
+            pen.setCapStyle(QtCore.Qt.FlatCap)
+            painter.setPen(pen)
+            # angles in 1/16 degrees, clockwise from 12 o'clock
+            painter.drawArc(rect, 90 * 16, -int(progress / self.progress_steps * 360 * 16))
+        color = state_colors[state]
+        if color is not None:
+            dot = max(4.0, size * 0.4)
+            painter.setPen(QtGui.QPen(QtGui.QColor(255, 255, 255), max(1.0, size / 24)))
+            painter.setBrush(QtGui.QColor(*color))
+            painter.drawEllipse(QtCore.QRectF(size - dot, size - dot, dot - 0.5, dot - 0.5))
+        if badge:
+            height = max(7.0, size * 0.5)
+            width = max(height, height * (0.45 + 0.3 * len(badge)))
+            rect = QtCore.QRectF(size - width, 0, width, height)
+            painter.setPen(QtCore.Qt.NoPen)
+            painter.setBrush(QtGui.QColor(*badge_color))
+            painter.drawRoundedRect(rect, height / 2, height / 2)
+            font = painter.font()
+            font.setPixelSize(max(6, int(height * 0.8)))
+            font.setBold(True)
+            painter.setFont(font)
+            painter.setPen(QtGui.QColor(255, 255, 255))
+            painter.drawText(rect, QtCore.Qt.AlignCenter, badge)
+        painter.end()
+        return pixmap